@@ -0,0 +1,84 @@
+import argparse
+import random
+import time
+from benchmarks.data import Zipf
+from collection_proect.completion_index import normalize
+from models.book import Book
+from models.library import Library
+
+
+SYLLABLES = ["ла", "ро", "ми", "ка", "те", "во", "ан", "ер", "ов", "ин",
+             "ский", "ко", "на", "ва", "де", "ль", "со", "ту", "ге", "бо"]
+
+
+def realistic_authors(count: int, rng: random.Random) -> list:
+    """Различные имена авторов из случайных слогов (имя и фамилия)"""
+    def word() -> str:
+        return "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+
+    names = set()
+    while len(names) < count:
+        names.add(f"{word()} {word()}")
+    return sorted(names)
+
+
+def scan_complete(library: Library, prefix: str, k: int) -> list:
+    """Прежний обходной путь: просмотр всех ключей индекса авторов"""
+    prefix = normalize(prefix)
+    found = [(author, len(books)) for author, books in library.index_dict._index_by_author.items()
+             if any(word.startswith(prefix) for word in [normalize(author)] + normalize(author).split())]
+    return sorted(found, key=lambda item: (-item[1], item[0]))[:k]
+
+
+def main():
+    """Автодополнение и нечёткий поиск по авторам"""
+    parser = argparse.ArgumentParser(description="Автодополнение по авторам")
+    parser.add_argument("--authors", type=int, default=100_000)
+    parser.add_argument("--books", type=int, default=300_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    authors = realistic_authors(args.authors, rng)
+    zipf = Zipf(authors)
+    # Каждый автор встречается хотя бы раз, остальные книги - по Ципфу
+    names = authors + zipf.samples(rng, max(0, args.books - len(authors)))
+    library = Library("Бенчмарк")
+    library.add_books(Book(f"Книга {i}", author, 2000, "Роман", f"978-{i:010d}")
+                      for i, author in enumerate(names))
+
+    start = time.perf_counter()
+    library.complete_author("")
+    print(f"{args.authors} авторов, построение индекса: {time.perf_counter() - start:.3f} с")
+
+    # Набор по буквам: префиксы длиной 1-5 случайных авторов
+    prefixes = [rng.choice(authors)[:rng.randint(1, 5)] for _ in range(args.queries)]
+    timings = []
+    # Первый проход заполняет кэш лучших значений для частых префиксов
+    for _ in range(2):
+        start = time.perf_counter()
+        for prefix in prefixes:
+            library.complete_author(prefix)
+        timings.append((time.perf_counter() - start) / len(prefixes) * 1e6)
+    sample = prefixes[:20]
+    start = time.perf_counter()
+    for prefix in sample:
+        assert scan_complete(library, prefix, 10) == library.complete_author(prefix)
+    scan_time = (time.perf_counter() - start) / len(sample) * 1e6
+    print(f"автодополнение: индекс {timings[0]:.1f} мкс (холодный кэш), {timings[1]:.1f} мкс, "
+          f"просмотр ключей {scan_time:.1f} мкс")
+
+    for distance in (1, 2):
+        typos = []
+        for author in rng.sample(authors, 50):
+            position = rng.randrange(len(author))
+            typos.append(author[:position] + author[position + 1:])
+        start = time.perf_counter()
+        for typo in typos:
+            library.fuzzy_author(typo, max_distance=distance)
+        print(f"нечёткий поиск, расстояние {distance}: "
+              f"{(time.perf_counter() - start) / len(typos) * 1e3:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import csv
+import json
+import os
+import tempfile
+import time
+from benchmarks.data import generate_books
+from models.library import Library
+from models.readers import FIELDS
+
+
+def write_files(count: int, directory: str) -> tuple:
+    """Запись синтетического каталога в CSV и JSON Lines"""
+    csv_path = os.path.join(directory, "books.csv")
+    jsonl_path = os.path.join(directory, "books.jsonl")
+    with open(csv_path, "w", encoding="utf-8", newline="") as csv_file, \
+            open(jsonl_path, "w", encoding="utf-8") as jsonl_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(FIELDS)
+        for book in generate_books(count):
+            info = book.get_info()
+            writer.writerow([info[field] for field in FIELDS])
+            jsonl_file.write(json.dumps(info, ensure_ascii=False) + "\n")
+    return csv_path, jsonl_path
+
+
+def per_book(count: int) -> Library:
+    """Прежний путь: add_book для каждой книги"""
+    library = Library("Бенчмарк")
+    for book in generate_books(count):
+        library.add_book(book)
+    return library
+
+
+def batched(count: int) -> Library:
+    """Пакетная загрузка из потока книг"""
+    library = Library("Бенчмарк")
+    library.add_books(generate_books(count))
+    return library
+
+
+def from_file(path: str) -> Library:
+    """Пакетная загрузка из файла"""
+    library = Library("Бенчмарк")
+    library.bulk_load(path)
+    return library
+
+
+def main():
+    """Сравнение загрузки каталога по одной книге и пакетами"""
+    parser = argparse.ArgumentParser(description="Скорость массовой загрузки")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path, jsonl_path = write_files(args.books, directory)
+        variants = [
+            ("add_book", lambda: per_book(args.books)),
+            ("add_books", lambda: batched(args.books)),
+            ("bulk_load csv", lambda: from_file(csv_path)),
+            ("bulk_load jsonl", lambda: from_file(jsonl_path)),
+        ]
+        print(f"Книг: {args.books}")
+        for name, load in variants:
+            start = time.perf_counter()
+            library = load()
+            elapsed = time.perf_counter() - start
+            assert len(library.book_collection) == args.books
+            print(f"  {name:<16} {elapsed:8.2f} с  ({args.books / elapsed:10.0f} книг/с)")
+            del library
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import random
+import threading
+import time
+from benchmarks.data import Zipf, author_names, generate_books
+from models.concurrent_library import ConcurrentLibrary
+from models.library import Library
+
+
+class GlobalLockLibrary:
+    """Прежний способ: все обращения к Library под одной блокировкой"""
+
+    def __init__(self, library: Library):
+        self._library = library
+        self._lock = threading.Lock()
+
+    def find_by_author(self, author: str):
+        """Поиск по автору под блокировкой"""
+        with self._lock:
+            return list(self._library.find_by_author(author))
+
+    def find_by_isbn(self, isbn: str):
+        """Поиск по ISBN под блокировкой"""
+        with self._lock:
+            return self._library.find_by_isbn(isbn)
+
+    def add_book(self, book):
+        """Добавление под блокировкой"""
+        with self._lock:
+            return self._library.add_book(book)
+
+
+def measure(target, threads: int, seconds: float, size: int) -> float:
+    """Число чтений в секунду при threads читателях и одном писателе"""
+    stop = threading.Event()
+    counts = [0] * threads
+    authors = Zipf(author_names(10_000))
+
+    def reader(slot: int) -> None:
+        rng = random.Random(slot)
+        done = 0
+        while not stop.is_set():
+            target.find_by_author(authors.sample(rng))
+            target.find_by_isbn(f"978-{rng.randrange(size):010d}")
+            done += 2
+        counts[slot] = done
+
+    def writer() -> None:
+        for book in generate_books(10 ** 9, seed=99, first_id=size):
+            if stop.is_set():
+                return
+            target.add_book(book)
+            time.sleep(0.001)
+
+    workers = [threading.Thread(target=reader, args=(i,)) for i in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds
+
+
+def main():
+    """Пропускная способность чтения при параллельной записи"""
+    parser = argparse.ArgumentParser(description="Многопоточное чтение")
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    for name, make in (("глобальная блокировка", GlobalLockLibrary),
+                       ("версии без блокировок", ConcurrentLibrary)):
+        library = Library("Бенчмарк")
+        library.add_books(generate_books(args.books))
+        target = make(library)
+        for threads in args.threads:
+            reads = measure(target, threads, args.seconds, args.books)
+            print(f"{name:<22} потоков {threads:>2}: {reads:12.0f} чтений/с")
+
+
+if __name__ == "__main__":
+    main()
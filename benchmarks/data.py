@@ -0,0 +1,52 @@
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterator, List, Optional, Sequence
+from models.book import Book
+
+
+TITLE_WORDS = ["Война", "мир", "Преступление", "наказание", "Мастер", "Маргарита",
+               "Властелин", "колец", "принц", "ночь", "дорога", "сад", "море",
+               "город", "история", "тайна", "время", "свет", "тень", "дом"]
+GENRES = ["Роман", "Фантастика", "Детектив", "Фэнтези", "Научная литература",
+          "Повесть", "Антиутопия", "Поэзия", "Биография", "Драма"]
+
+
+class Zipf:
+    """Выбор значений по закону Ципфа: k-е значение с весом 1 / k^exponent"""
+
+    def __init__(self, values: Sequence, exponent: float = 1.1):
+        self.values = values
+        self._cum_weights = list(accumulate(1 / rank ** exponent
+                                            for rank in range(1, len(values) + 1)))
+
+    def sample(self, rng: random.Random):
+        """Одно значение"""
+        position = bisect_right(self._cum_weights, rng.random() * self._cum_weights[-1])
+        return self.values[min(position, len(self.values) - 1)]
+
+    def samples(self, rng: random.Random, count: int) -> List:
+        """Несколько значений"""
+        return rng.choices(self.values, cum_weights=self._cum_weights, k=count)
+
+
+def author_names(count: int) -> List[str]:
+    """Имена синтетических авторов"""
+    return [f"Автор {i}" for i in range(count)]
+
+
+def generate_books(count: int, seed: Optional[int] = 0, authors: int = 10_000,
+                   first_id: int = 0) -> Iterator[Book]:
+    """Генерация синтетического каталога книг
+
+    Авторы и жанры распределены по Ципфу: немногие популярные авторы
+    и жанры встречаются часто, остальные - редко. ISBN уникальны
+    и нумеруются с first_id.
+    """
+    rng = random.Random(seed)
+    author_zipf = Zipf(author_names(authors))
+    genre_zipf = Zipf(GENRES)
+    for i in range(first_id, first_id + count):
+        title = " ".join(rng.choices(TITLE_WORDS, k=3)) + f" {i}"
+        yield Book(title, author_zipf.sample(rng), rng.randint(1800, 2023),
+                   genre_zipf.sample(rng), f"978-{i:010d}")
@@ -0,0 +1,57 @@
+import argparse
+import gc
+import tracemalloc
+from benchmarks.data import generate_books
+from collection_proect.book_store import BookStore
+
+
+class DictBook:
+    """Книга в прежнем виде: обычный объект с __dict__, без интернирования"""
+
+    def __init__(self, title: str, author: str, year: int, genre: str, isbn: str):
+        self.title = title
+        self.author = author
+        self.year = year
+        self.genre = genre
+        self.isbn = isbn
+
+
+def measure(build) -> int:
+    """Объём памяти (в байтах), удерживаемой результатом build()"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main():
+    """Сравнение памяти на книгу для разных представлений"""
+    parser = argparse.ArgumentParser(description="Память на одну книгу")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    args = parser.parse_args()
+    n = args.books
+
+    # Строки генерируются заново для каждого варианта, чтобы дубли авторов
+    # и жанров не разделялись между вариантами
+    def dict_books():
+        return [DictBook(b.title, "".join(b.author), b.year, "".join(b.genre), b.isbn)
+                for b in generate_books(n)]
+
+    variants = [
+        ("dict Book", dict_books),
+        ("slots Book", lambda: list(generate_books(n))),
+        ("BookStore", lambda: BookStore(generate_books(n))),
+    ]
+    print(f"Книг: {n}")
+    baseline = None
+    for name, build in variants:
+        size = measure(build)
+        baseline = baseline or size
+        print(f"  {name:<12} {size / n:8.1f} байт/книга  (x{baseline / size:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import sys
+from typing import List, Optional
+from benchmarks.data import generate_books
+from benchmarks.suite import percentile
+from biblio import LibrarySimulation
+from models.concurrent_library import ConcurrentLibrary
+from models.library import Library
+from models.sharded_library import ShardedLibrary
+from models.trace import TraceWriter, replay
+
+
+def record(args) -> int:
+    """Запись трассы симуляции на синтетическом каталоге"""
+    library = Library("Трасса")
+    library.add_books(generate_books(args.books, seed=args.seed))
+    with open(args.trace, "w", encoding="utf-8") as file:
+        writer = TraceWriter(file, seed=args.seed, steps=args.steps, books=args.books)
+        simulation = LibrarySimulation(library, verbose=False, log_size=0, trace=writer)
+        simulation.run_batched(args.steps, seed=args.seed)
+    print(f"Записано операций: {writer.operations}")
+    return 0
+
+
+def run(args) -> int:
+    """Воспроизведение трассы на выбранной реализации библиотеки"""
+    if args.backend == "sharded":
+        library = ShardedLibrary("Трасса", shards=args.shards)
+    elif args.backend == "concurrent":
+        library = ConcurrentLibrary(name="Трасса")
+    else:
+        library = Library("Трасса")
+    try:
+        report = replay(library, args.trace)
+    finally:
+        if args.backend == "sharded":
+            library.close()
+
+    print(f"{args.backend}: {report['operations']} операций за {report['seconds']:.2f} с, "
+          f"{report['operations'] / max(report['seconds'], 1e-9):.0f} оп/с")
+    for method, values in sorted(report["latencies_ns"].items()):
+        values.sort()
+        print(f"  {method:<20} n={len(values):<7} p50={percentile(values, 0.5) / 1000:9.1f} мкс "
+              f"p99={percentile(values, 0.99) / 1000:9.1f} мкс")
+    print(f"Контрольная сумма: {report['checksum']:08x}")
+    if report["mismatches"]:
+        print(f"Расхождений с трассой: {report['mismatches']} "
+              f"(первое - строка {report['first_mismatch_line']})")
+        return 1
+    print("Результаты совпадают с трассой")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Запись и воспроизведение трасс операций"""
+    parser = argparse.ArgumentParser(description="Трассы операций LibrarySimulation")
+    commands = parser.add_subparsers(dest="command", required=True)
+    recorder = commands.add_parser("record", help="записать трассу симуляции")
+    recorder.add_argument("trace")
+    recorder.add_argument("--books", type=int, default=10_000)
+    recorder.add_argument("--steps", type=int, default=100_000)
+    recorder.add_argument("--seed", type=int, default=0)
+    player = commands.add_parser("run", help="воспроизвести трассу")
+    player.add_argument("trace")
+    player.add_argument("--backend", choices=["library", "concurrent", "sharded"],
+                        default="library")
+    player.add_argument("--shards", type=int, default=4)
+    args = parser.parse_args(argv)
+    return record(args) if args.command == "record" else run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+from benchmarks.data import GENRES, TITLE_WORDS, Zipf, author_names, generate_books
+from benchmarks.suite import percentile
+from models.library import Library
+from service import LibraryService
+
+
+def make_requests(count: int, books: int, seed: int) -> List[str]:
+    """Смесь запросов: популярные авторы и жанры по Ципфу, изредка поиск по названию"""
+    rng = random.Random(seed)
+    authors = Zipf(author_names(10_000))
+    genres = Zipf(GENRES)
+    requests = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.6:
+            target = f"/author?q={quote(authors.sample(rng))}"
+        elif kind < 0.75:
+            target = f"/isbn?q={quote(f'978-{rng.randrange(books):010d}')}"
+        elif kind < 0.85:
+            target = f"/genre?q={quote(genres.sample(rng))}&limit=10"
+        elif kind < 0.95:
+            target = f"/year?q={rng.randint(1800, 2023)}&limit=10"
+        else:
+            target = f"/title?q={quote(rng.choice(TITLE_WORDS))}&limit=10"
+        requests.append(target)
+    return requests
+
+
+async def client(host: str, port: int, targets: List[str], latencies: List[int]) -> None:
+    """Одно соединение keep-alive: запросы по очереди с замером задержки"""
+    reader, writer = await asyncio.open_connection(host, port)
+    clock = time.perf_counter_ns
+    for target in targets:
+        start = clock()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode('latin-1'))
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        await reader.readexactly(length)
+        latencies.append(clock() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def load(host: str, port: int, requests: List[str], connections: int) -> Tuple[float, List[int]]:
+    """Прогон запросов по connections соединениям: (секунды, задержки в нс)"""
+    latencies: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests[slot::connections], latencies)
+                           for slot in range(connections)))
+    return time.perf_counter() - start, latencies
+
+
+def report(label: str, seconds: float, latencies: List[int]) -> None:
+    """Пропускная способность и хвост задержек"""
+    latencies.sort()
+    print(f"{label:<22} {len(latencies) / seconds:8.0f} запр/с  "
+          f"p50={percentile(latencies, 0.5) / 1e6:6.2f} мс  "
+          f"p99={percentile(latencies, 0.99) / 1e6:6.2f} мс  "
+          f"p99.9={percentile(latencies, 0.999) / 1e6:6.2f} мс")
+
+
+async def run_local(args, requests: List[str]) -> None:
+    """Сервис и клиенты в одном процессе: сравнение окон накопления"""
+    library = Library("Нагрузка")
+    library.add_books(generate_books(args.books, seed=args.seed))
+    # Индекс триграмм строится при первом поиске по названию - до замеров
+    library.find_by_title(TITLE_WORDS[0])
+    for window in args.windows:
+        service = LibraryService(library, port=0, window=window)
+        await service.start()
+        seconds, latencies = await load(service.host, service.port, requests, args.connections)
+        report(f"окно {window * 1000:.1f} мс", seconds, latencies)
+        stats = service.statistics()
+        print(f"{'':<22} пачек: {stats.get('batches', 0)}, обращений к индексу: "
+              f"{stats.get('index_accesses', 0)}, объединено: {stats.get('coalesced', 0)}, "
+              f"просмотров: {stats.get('scans', 0)}")
+        await service.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Генератор нагрузки для LibraryService"""
+    parser = argparse.ArgumentParser(description="Нагрузка на HTTP-сервис библиотеки")
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--windows", type=float, nargs="+", default=[0.0, 0.0005, 0.002],
+                        help="окна накопления пачки, секунд")
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="нагружать уже запущенный сервис (python service.py)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    requests = make_requests(args.requests, args.books, args.seed)
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        seconds, latencies = asyncio.run(load(host, int(port), requests, args.connections))
+        report(args.connect, seconds, latencies)
+    else:
+        asyncio.run(run_local(args, requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.data import generate_books
+from models.library import Library
+
+
+def main():
+    """Время холодного старта: снимок против повторной загрузки книг"""
+    parser = argparse.ArgumentParser(description="Старт библиотеки из снимка")
+    parser.add_argument("--books", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    library = Library("Бенчмарк")
+    library.add_books(generate_books(args.books))
+    print(f"Построение из книг:       {time.perf_counter() - start:8.3f} с")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "library.snap")
+        start = time.perf_counter()
+        library.save_snapshot(path)
+        print(f"Запись снимка:            {time.perf_counter() - start:8.3f} с "
+              f"({os.path.getsize(path) / 2 ** 20:.1f} МБ)")
+
+        isbn = library.book_collection[args.books // 2].isbn
+        author = library.book_collection[args.books // 2].author
+        start = time.perf_counter()
+        loaded = Library.load_snapshot(path)
+        book = loaded.find_by_isbn(isbn)
+        books = loaded.find_by_author(author)
+        elapsed = time.perf_counter() - start
+        assert book == library.find_by_isbn(isbn)
+        assert len(books) == len(library.find_by_author(author))
+        print(f"Открытие снимка и поиск:  {elapsed * 1000:8.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import json
+import platform
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Dict, List, Optional
+from benchmarks.data import GENRES, Zipf, author_names, generate_books
+from biblio import KeySampler
+from models.book import Book
+from models.library import Library
+
+
+AUTHORS = 10_000
+# Смесь операций повторяет веса событий LibrarySimulation,
+# плюс поиск по части названия
+WORKLOAD = [
+    ("add_book", 0.2),
+    ("remove_book", 0.15),
+    ("find_by_author", 0.15),
+    ("find_by_genre", 0.15),
+    ("find_by_year", 0.1),
+    ("update_book", 0.1),
+    ("find_by_isbn", 0.05),
+    ("find_by_title", 0.05),
+]
+
+
+def percentile(sorted_values: List[int], fraction: float) -> float:
+    """Перцентиль отсортированного списка"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run_size(size: int, operations: int, seed: int) -> dict:
+    """Построение каталога заданного размера и прогон смешанной нагрузки"""
+    rng = random.Random(seed)
+    library = Library("Бенчмарк")
+    start = time.perf_counter()
+    library.add_books(generate_books(size, seed=seed, authors=AUTHORS))
+    build_seconds = time.perf_counter() - start
+
+    isbns = KeySampler(library.index_dict)
+    authors = Zipf(author_names(AUTHORS))
+    genres = Zipf(GENRES)
+    new_books = generate_books(operations, seed=seed + 1, authors=AUTHORS, first_id=size)
+    names, weights = zip(*WORKLOAD)
+    plan = rng.choices(names, cum_weights=list(accumulate(weights)), k=operations)
+    latencies: Dict[str, List[int]] = {name: [] for name in names}
+    clock = time.perf_counter_ns
+
+    started = time.perf_counter()
+    for step, name in enumerate(plan):
+        if name == "add_book":
+            book = next(new_books)
+            begin = clock()
+            library.add_book(book)
+            elapsed = clock() - begin
+            isbns.add(book.isbn)
+        elif name in ("remove_book", "update_book"):
+            if not len(isbns):
+                continue
+            isbn = isbns.choice(rng)
+            isbns.discard(isbn)
+            if name == "remove_book":
+                begin = clock()
+                library.remove_book_by_isbn(isbn)
+                elapsed = clock() - begin
+            else:
+                old = library.find_by_isbn(isbn)
+                book = Book(old.title + " (обновленное издание)", old.author, old.year + 1,
+                            old.genre, f"UPD-{step}")
+                begin = clock()
+                library.update_book(isbn, book)
+                elapsed = clock() - begin
+                isbns.add(book.isbn)
+        else:
+            if name == "find_by_author":
+                key = authors.sample(rng)
+            elif name == "find_by_genre":
+                key = genres.sample(rng)
+            elif name == "find_by_year":
+                key = rng.randint(1800, 2023)
+            elif name == "find_by_isbn":
+                key = f"FAKE-{rng.randint(1000, 9999)}"
+            else:
+                key = f"{rng.randrange(size)}"
+            method = getattr(library, name)
+            begin = clock()
+            method(key)
+            elapsed = clock() - begin
+        latencies[name].append(elapsed)
+    total_seconds = time.perf_counter() - started
+
+    result = {
+        "size": size,
+        "operations": operations,
+        "build_seconds": build_seconds,
+        "throughput": operations / total_seconds,
+        # ru_maxrss в Linux - в килобайтах
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "latency_us": {},
+    }
+    for name, values in latencies.items():
+        values.sort()
+        result["latency_us"][name] = {
+            "count": len(values),
+            "p50": percentile(values, 0.5) / 1000,
+            "p99": percentile(values, 0.99) / 1000,
+        }
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Список регрессий относительно базовых результатов"""
+    regressions = []
+    base_by_size = {run["size"]: run for run in baseline["runs"]}
+    for run in results["runs"]:
+        base = base_by_size.get(run["size"])
+        if base is None:
+            continue
+        if run["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{run['size']}: пропускная способность "
+                               f"{run['throughput']:.0f} < {base['throughput']:.0f} оп/с")
+        for name, latency in run["latency_us"].items():
+            base_latency = base["latency_us"].get(name)
+            if not base_latency:
+                continue
+            for key in ("p50", "p99"):
+                if latency[key] > base_latency[key] * (1 + tolerance):
+                    regressions.append(f"{run['size']}: {name} {key} "
+                                       f"{latency[key]:.1f} > {base_latency[key]:.1f} мкс")
+    return regressions
+
+
+def print_run(run: dict) -> None:
+    """Вывод результатов одного размера каталога"""
+    print(f"\n{run['size']} книг: загрузка {run['build_seconds']:.2f} с, "
+          f"{run['throughput']:.0f} оп/с, пик RSS {run['peak_rss_mb']:.1f} МБ")
+    for name, latency in run["latency_us"].items():
+        print(f"  {name:<15} n={latency['count']:<7} p50={latency['p50']:9.1f} мкс "
+              f"p99={latency['p99']:9.1f} мкс")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Набор бенчмарков Library с проверкой регрессий"""
+    parser = argparse.ArgumentParser(description="Бенчмарки Library, BookCollection и IndexDict")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--operations", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="файл для результатов в JSON")
+    parser.add_argument("--baseline", help="JSON с базовыми результатами для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="допустимое ухудшение (доля), по умолчанию 0.2")
+    args = parser.parse_args(argv)
+
+    results = {"python": platform.python_version(), "platform": platform.platform(),
+               "seed": args.seed, "runs": []}
+    for size in args.sizes:
+        # Каждый размер - в отдельном процессе, чтобы пик памяти не смешивался
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            run = pool.submit(run_size, size, args.operations, args.seed).result()
+        print_run(run)
+        results["runs"].append(run)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nРегрессии:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nРегрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import argparse
+import random
+import time
+from benchmarks.data import generate_books, TITLE_WORDS
+from models.library import Library
+
+
+def scan_by_title(library: Library, title_part: str) -> list:
+    """Прежний алгоритм: полный просмотр коллекции"""
+    return [book for book in library.book_collection
+            if title_part.lower() in book.title.lower()]
+
+
+def timed(func, queries) -> tuple:
+    """Среднее время запроса (мкс) и результаты"""
+    start = time.perf_counter()
+    results = [func(query) for query in queries]
+    return (time.perf_counter() - start) / len(queries) * 1e6, results
+
+
+def main():
+    """Сравнение поиска по названию: просмотр и триграммный индекс"""
+    parser = argparse.ArgumentParser(description="Поиск по части названия")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    for size in args.sizes:
+        library = Library("Бенчмарк")
+        for book in generate_books(size):
+            library.add_book(book)
+        # Редкие запросы (номер книги) и частые (слово из названия)
+        workloads = {
+            "редкие": [f"{rng.choice(TITLE_WORDS)} {rng.randrange(size)}".lower()
+                       for _ in range(args.queries)],
+            "частые": [rng.choice(TITLE_WORDS).lower() for _ in range(args.queries)],
+        }
+        for name, queries in workloads.items():
+            scan_time, expected = timed(lambda q: scan_by_title(library, q), queries)
+            index_time, actual = timed(lambda q: list(library.find_by_title(q)), queries)
+            assert expected == actual, "результаты индекса расходятся с просмотром"
+            print(f"{size:>8} книг, {name}: просмотр {scan_time:10.1f} мкс, "
+                  f"индекс {index_time:10.1f} мкс")
+
+if __name__ == "__main__":
+    main()
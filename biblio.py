@@ -1,15 +1,90 @@
+import copy
+import os
 import random
-from typing import Optional
+import tempfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Iterable, Optional, TextIO
 from models.book import Book
 from models.library import Library
+from models.trace import TraceWriter, TracingLibrary
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+TITLES = ["Война и мир", "Преступление и наказание", "1984",
+          "Мастер и Маргарита", "Гарри Поттер", "Властелин колец"]
+AUTHORS = ["Лев Толстой", "Фёдор Достоевский", "Джордж Оруэлл",
+           "Михаил Булгаков", "Джоан Роулинг", "Джон Толкин"]
+GENRES = ["Роман", "Фантастика", "Детектив", "Фэнтези", "Научная литература"]
+
+
+class KeySampler:
+    """Множество ключей с добавлением, удалением и случайным выбором за O(1)"""
+
+    def __init__(self, keys: Iterable = ()):
+        self._items = list(keys)
+        self._positions = {key: i for i, key in enumerate(self._items)}
+
+    def __len__(self) -> int:
+        """Количество ключей"""
+        return len(self._items)
+
+    def add(self, key) -> None:
+        """Добавление ключа"""
+        if key not in self._positions:
+            self._positions[key] = len(self._items)
+            self._items.append(key)
+
+    def discard(self, key) -> None:
+        """Удаление ключа: на его место переносится последний"""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last] = position
+
+    def choice(self, rng: random.Random):
+        """Случайный ключ"""
+        return rng.choice(self._items)
 
 
 class LibrarySimulation:
-    """Класс для псевдослучайной симуляции работы библиотеки"""
+    """Класс для псевдослучайной симуляции работы библиотеки
+
+    Ключи для случайного выбора (ISBN, авторы, жанры, годы) хранятся
+    в KeySampler и обновляются событиями по ходу симуляции, а не
+    собираются из индексов на каждом шаге. Лог может быть ограничен
+    (log_size - кольцевой буфер), писаться в файл и не печататься.
+
+    У каждой симуляции свой генератор random.Random, поэтому несколько
+    симуляций с разными seed могут работать в одном процессе.
+    Итоги прогона (число событий, попадания и промахи поиска) копятся
+    в счётчике stats.
+
+    С trace (models.trace.TraceWriter) в трассу записываются начальный
+    каталог и каждая операция с библиотекой вместе с аргументами -
+    трассу можно воспроизвести на другой реализации (models.trace.replay).
+    """
 
-    def __init__(self, library: Library):
+    def __init__(self, library: Library, verbose: bool = True,
+                 log_size: Optional[int] = None, log_file: Optional[TextIO] = None,
+                 trace: Optional[TraceWriter] = None):
+        if trace is not None:
+            trace.write_setup(library.book_collection)
+            library = TracingLibrary(library, trace)
         self.library = library
-        self.events_log = []
+        self.verbose = verbose
+        self.log_file = log_file
+        self.events_log = deque(maxlen=log_size) if log_size is not None else []
+        self.random = random.Random()
+        self.stats = Counter()
 
         # Список возможных событий с их вероятностями
         self.events = [
@@ -21,98 +96,163 @@ class LibrarySimulation:
             (self.event_update_random_book, 0.1),
             (self.event_search_nonexistent_book, 0.05),
         ]
+        self._samplers = {}
+
+    def _reset_samplers(self) -> None:
+        """Построение выборщиков ключей по текущему состоянию библиотеки"""
+        index = self.library.index_dict
+        self._samplers = {
+            'isbn': KeySampler(index),
+            'author': KeySampler(index.authors()),
+            'genre': KeySampler(index.genres()),
+            'year': KeySampler(index.years()),
+        }
+
+    def _sampler(self, kind: str) -> KeySampler:
+        """Выборщик ключей нужного вида"""
+        if not self._samplers:
+            self._reset_samplers()
+        return self._samplers[kind]
+
+    def _track_added(self, book: 'Book') -> None:
+        """Учёт ключей добавленной книги"""
+        if self._samplers:
+            self._samplers['isbn'].add(book.isbn)
+            self._samplers['author'].add(book.author)
+            self._samplers['genre'].add(book.genre)
+            self._samplers['year'].add(book.year)
+
+    def _track_removed(self, book: 'Book') -> None:
+        """Учёт ключей удалённой книги: ключ исчезает вместе с последней книгой"""
+        if self._samplers:
+            index = self.library.index_dict
+            self._samplers['isbn'].discard(book.isbn)
+            if not index.search_by_author(book.author):
+                self._samplers['author'].discard(book.author)
+            if not index.search_by_genre(book.genre):
+                self._samplers['genre'].discard(book.genre)
+            if not index.search_by_year(book.year):
+                self._samplers['year'].discard(book.year)
 
-    def log_event(self, message: str) -> None:
-        """Логирование события"""
+    def _logging(self) -> bool:
+        """Есть ли, куда писать лог (печать, файл или непустой буфер)"""
+        return (self.verbose or self.log_file is not None
+                or getattr(self.events_log, 'maxlen', None) != 0)
+
+    def log_event(self, message: str, *args) -> None:
+        """Логирование события
+
+        С аргументами message - шаблон str.format; он форматируется,
+        только если лог куда-то пишется.
+        """
+        if not self._logging():
+            return
+        if args:
+            message = message.format(*args)
         self.events_log.append(message)
-        print(message)
+        if self.log_file is not None:
+            self.log_file.write(message + "\n")
+        if self.verbose:
+            print(message)
 
     def event_add_book(self) -> None:
         """Событие: добавление новой книги"""
         # Генерация случайной книги
-        titles = ["Война и мир", "Преступление и наказание", "1984",
-                  "Мастер и Маргарита", "Гарри Поттер", "Властелин колец"]
-        authors = ["Лев Толстой", "Фёдор Достоевский", "Джордж Оруэлл",
-                   "Михаил Булгаков", "Джоан Роулинг", "Джон Толкин"]
-        genres = ["Роман", "Фантастика", "Детектив", "Фэнтези", "Научная литература"]
-
-        title = random.choice(titles) + f" {random.randint(1, 100)}"
-        author = random.choice(authors)
-        year = random.randint(1900, 2023)
-        genre = random.choice(genres)
-        isbn = f"978-{random.randint(100, 999)}-{random.randint(10, 99)}-{random.randint(1000, 9999)}"
+        title = self.random.choice(TITLES) + f" {self.random.randint(1, 100)}"
+        author = self.random.choice(AUTHORS)
+        year = self.random.randint(1900, 2023)
+        genre = self.random.choice(GENRES)
+        isbn = f"978-{self.random.randint(100, 999)}-{self.random.randint(10, 99)}-{self.random.randint(1000, 9999)}"
 
         book = Book(title, author, year, genre, isbn)
 
         if self.library.add_book(book):
-            self.log_event(f"Добавлена новая книга: {book.title} (ISBN: {isbn})")
+            self._track_added(book)
+            self.stats['added'] += 1
+            self.log_event("Добавлена новая книга: {} (ISBN: {})", book.title, isbn)
         else:
-            self.log_event(f"Книга с ISBN {isbn} уже существует")
+            self.log_event("Книга с ISBN {} уже существует", isbn)
 
     def event_remove_random_book(self) -> None:
         """Событие: удаление случайной книги"""
-        if len(self.library.book_collection) == 0:
+        isbns = self._sampler('isbn')
+        if len(isbns) == 0:
             self.log_event("Нет книг для удаления")
             return
 
         # Выбор случайной книги
-        random_index = random.randint(0, len(self.library.book_collection) - 1)
-        book = self.library.book_collection[random_index]
+        book = self.library.find_by_isbn(isbns.choice(self.random))
 
-        if self.library.remove_book(book):
-            self.log_event(f"Удалена книга: {book.title} (ISBN: {book.isbn})")
+        if book is not None and self.library.remove_book(book):
+            self._track_removed(book)
+            self.stats['removed'] += 1
+            self.log_event("Удалена книга: {} (ISBN: {})", book.title, book.isbn)
         else:
-            self.log_event(f"Не удалось удалить книгу {book.title}")
+            self.log_event("Не удалось удалить случайную книгу")
 
     def event_search_by_author(self) -> None:
         """Событие: поиск по автору"""
-        authors = list(self.library.index_dict._index_by_author.keys())
-        if not authors:
+        authors = self._sampler('author')
+        if len(authors) == 0:
             self.log_event("Нет авторов в библиотеке")
             return
 
-        author = random.choice(authors)
+        author = authors.choice(self.random)
         books = self.library.find_by_author(author)
+        self.stats['search_hit' if len(books) else 'search_miss'] += 1
 
+        if not self._logging():
+            return
         self.log_event(f"Поиск по автору '{author}': найдено {len(books)} книг")
         for i, book in enumerate(books[:3], 1):  # Показываем только первые 3
             self.log_event(f"    {i}. {book.title} ({book.year})")
 
     def event_search_by_genre(self) -> None:
         """Событие: поиск по жанру"""
-        genres = list(self.library.index_dict._index_by_genre.keys())
-        if not genres:
+        genres = self._sampler('genre')
+        if len(genres) == 0:
             self.log_event("Нет книг по жанрам")
             return
 
-        genre = random.choice(genres)
+        genre = genres.choice(self.random)
         books = self.library.find_by_genre(genre)
+        self.stats['search_hit' if len(books) else 'search_miss'] += 1
 
+        if not self._logging():
+            return
         self.log_event(f"Поиск по жанру '{genre}': найдено {len(books)} книг")
         for i, book in enumerate(books[:3], 1):
             self.log_event(f"    {i}. {book.title} - {book.author}")
 
     def event_search_by_year(self) -> None:
         """Событие: поиск по году"""
-        years = list(self.library.index_dict._index_by_year.keys())
-        if not years:
+        years = self._sampler('year')
+        if len(years) == 0:
             self.log_event("Нет книг по годам")
             return
 
-        year = random.choice(years)
+        year = years.choice(self.random)
         books = self.library.find_by_year(year)
+        self.stats['search_hit' if len(books) else 'search_miss'] += 1
 
+        if not self._logging():
+            return
         self.log_event(f"Поиск по году {year}: найдено {len(books)} книг")
         for i, book in enumerate(books[:2], 1):
             self.log_event(f"    {i}. {book.title} - {book.author}")
 
     def event_update_random_book(self) -> None:
         """Событие: обновление случайной книги"""
-        if len(self.library.book_collection) == 0:
+        isbns = self._sampler('isbn')
+        if len(isbns) == 0:
             self.log_event("Нет книг для обновления")
             return
-        random_index = random.randint(0, len(self.library.book_collection) - 1)
-        old_book = self.library.book_collection[random_index]
+        old_book = self.library.find_by_isbn(isbns.choice(self.random))
+        if old_book is None:
+            self.log_event("Не удалось обновить случайную книгу")
+            return
+        # update_book меняет хранимую книгу на месте - запоминаем прежние поля
+        old_book = copy.copy(old_book)
         new_book = Book(
             title=old_book.title + " (обновленное издание)",
             author=old_book.author,
@@ -122,35 +262,121 @@ class LibrarySimulation:
         )
 
         if self.library.update_book(old_book.isbn, new_book):
-            self.log_event(f"Обновлена книга: {old_book.title} -> {new_book.title}")
+            self._track_removed(old_book)
+            self._track_added(new_book)
+            self.stats['updated'] += 1
+            self.log_event("Обновлена книга: {} -> {}", old_book.title, new_book.title)
         else:
-            self.log_event(f"Не удалось обновить книгу {old_book.title}")
+            self.log_event("Не удалось обновить книгу {}", old_book.title)
 
     def event_search_nonexistent_book(self) -> None:
         """Событие: поиск несуществующей книги"""
-        fake_isbn = f"FAKE-{random.randint(1000, 9999)}"
+        fake_isbn = f"FAKE-{self.random.randint(1000, 9999)}"
         book = self.library.find_by_isbn(fake_isbn)
 
+        self.stats['search_miss' if book is None else 'search_hit'] += 1
         if book is None:
-            self.log_event(f"Поиск несуществующей книги (ISBN: {fake_isbn}): не найдено")
+            self.log_event("Поиск несуществующей книги (ISBN: {}): не найдено", fake_isbn)
         else:
-            self.log_event(f"Найдена книга, которой не должно быть: {book.title}")
+            self.log_event("Найдена книга, которой не должно быть: {}", book.title)
 
     def run_simulation(self, steps: int = 20, seed: Optional[int] = None) -> None:
         """Основная функция симуляции"""
         if seed is not None:
-            random.seed(seed)
+            self.random.seed(seed)
             self.log_event(f"Установлен seed: {seed}")
         self.log_event(f"Начало симуляции ({steps} шагов)")
+        self._reset_samplers()
 
         for step in range(1, steps + 1):
             self.log_event(f"\nШаг {step}:")
             events, weights = zip(*self.events)
-            chosen_event = random.choices(events, weights=weights, k=1)[0]
+            chosen_event = self.random.choices(events, weights=weights, k=1)[0]
+            self.stats[chosen_event.__name__] += 1
             chosen_event()
         self.log_event(f"    Всего событий: {len(self.events_log)}")
         self.log_event(f"    Книг в библиотеке: {len(self.library.book_collection)}")
 
+    def _draw_events(self, count: int, rng) -> list:
+        """Пачка заранее выбранных событий с учётом весов"""
+        events, weights = zip(*self.events)
+        if rng is not None:
+            probabilities = np.array(weights) / sum(weights)
+            return [events[i] for i in rng.choice(len(events), size=count, p=probabilities)]
+        return self.random.choices(events, cum_weights=list(accumulate(weights)), k=count)
+
+    def run_batched(self, steps: int, seed: Optional[int] = None,
+                    chunk_size: int = 10_000, log_size: int = 1000) -> None:
+        """Быстрая симуляция: события выбираются пачками по chunk_size
+
+        Последовательность событий выбирается через NumPy (если он
+        установлен) или random.choices(k=...), без журнала шагов.
+        При одном и том же seed последовательность событий совпадает.
+        События не печатаются; неограниченный лог становится кольцевым
+        буфером из log_size последних сообщений (log_size=0 - без лога,
+        сообщения тогда и не форматируются). Файл лога, если он задан,
+        получает все сообщения.
+        """
+        if seed is not None:
+            self.random.seed(seed)
+        if not isinstance(self.events_log, deque):
+            self.events_log = deque(self.events_log, maxlen=log_size)
+        verbose, self.verbose = self.verbose, False
+        rng = np.random.default_rng(seed) if np is not None else None
+        self._reset_samplers()
+        try:
+            for start in range(0, steps, chunk_size):
+                for event in self._draw_events(min(chunk_size, steps - start), rng):
+                    self.stats[event.__name__] += 1
+                    event()
+            self.log_event("    Книг в библиотеке: {}", len(self.library.book_collection))
+        finally:
+            self.verbose = verbose
+
     def get_log(self) -> list:
         """Получение лога событий"""
-        return self.events_log
\ No newline at end of file
+        return list(self.events_log)
+
+    def get_summary(self) -> dict:
+        """Итоги прогона: размер библиотеки и счётчики событий"""
+        return {'final_size': len(self.library.book_collection), 'stats': dict(self.stats)}
+
+
+def _run_scenario(task: tuple) -> dict:
+    """Один прогон в процессе пула: библиотека открывается из снимка"""
+    snapshot_path, seed, steps = task
+    library = Library.load_snapshot(snapshot_path)
+    simulation = LibrarySimulation(library, verbose=False, log_size=0)
+    simulation.run_batched(steps, seed=seed)
+    return dict(simulation.get_summary(), seed=seed)
+
+
+def run_many(library: Library, seeds: Iterable[int], steps: int,
+             workers: Optional[int] = None) -> dict:
+    """Параллельный запуск независимых симуляций с разными seed
+
+    Базовая библиотека передаётся процессам пула как файл снимка, каждый
+    прогон работает со своей копией. Возвращаются объединённые счётчики,
+    а не логи прогонов.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, "base.snap")
+        library.save_snapshot(snapshot_path)
+        tasks = [(snapshot_path, seed, steps) for seed in seeds]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_run_scenario, tasks))
+
+    totals = Counter()
+    for run in runs:
+        totals.update(run['stats'])
+    sizes = [run['final_size'] for run in runs]
+    searches = totals['search_hit'] + totals['search_miss']
+    return {
+        'runs': len(runs),
+        'steps': steps,
+        'final_size': {'min': min(sizes, default=0), 'max': max(sizes, default=0),
+                       'mean': sum(sizes) / len(sizes) if sizes else 0.0},
+        'stats': dict(totals),
+        'hit_rate': totals['search_hit'] / searches if searches else 0.0,
+        'per_run': {run['seed']: run['final_size'] for run in runs},
+    }
\ No newline at end of file
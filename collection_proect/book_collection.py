@@ -1,25 +1,121 @@
-from typing import Iterator, Union, List, Any
+from array import array
+from bisect import bisect_right, insort
+from typing import Iterator, Iterable, Union, List, Dict, Any, Optional, Callable, NamedTuple, Tuple
+from collection_proect.views import SliceView, FilterView, MapView
+from models.book import Book
+
+
+class Page(NamedTuple):
+    """Страница книг и курсор следующей страницы (None - страниц больше нет)"""
+    books: List['Book']
+    next_cursor: Optional[int]
 
 
 class BookCollection:
-    """Пользовательская списковая коллекция для хранения книг"""
+    """Пользовательская списковая коллекция для хранения книг
+
+    Помимо списка хранится словарь ISBN -> позиция в списке, поэтому
+    проверка наличия, добавление и удаление выполняются за O(1).
+    Удалённые элементы помечаются "надгробием" (None) и вычищаются
+    при уплотнении, порядок оставшихся книг при этом не меняется.
+    Позиции надгробий хранятся в отсортированном списке, поэтому доступ
+    по индексу переводит индекс в позицию списка через bisect, без уплотнения.
+
+    Срезы, filter и map возвращают ленивые представления без копирования.
+    Для постраничной выдачи каждой позиции списка сопоставлен возрастающий
+    порядковый номер; курсор страницы - номер последней выданной книги,
+    поэтому добавления и удаления не сдвигают следующие страницы.
+    """
 
     def __init__(self, books: List['Book'] = None):
-        self._books = books if books is not None else []
+        self._books: List[Optional['Book']] = books if books is not None else []
+        # Список, переданный снаружи (например, результат из кэша запросов), не изменяем:
+        # перед первой модификацией делается собственная копия
+        self._owns_list = books is None
+        self._positions: Optional[Dict[str, int]] = None
+        self._holes: List[int] = []
+        self._sequence: Optional[array] = None
+        self._next_sequence = 0
+
+    def _get_positions(self) -> Dict[str, int]:
+        """Ленивое построение словаря ISBN -> позиция"""
+        if self._positions is None:
+            self._positions = {}
+            for i, book in enumerate(self._books):
+                if book is not None:
+                    self._positions.setdefault(book.isbn, i)
+        return self._positions
+
+    def _ensure_owned(self) -> None:
+        """Копирование чужого списка перед изменением"""
+        if not self._owns_list:
+            self._books = list(self._books)
+            self._owns_list = True
+
+    def _compact(self) -> None:
+        """Уплотнение: удаление надгробий с сохранением порядка"""
+        if not self._holes:
+            return
+        self._ensure_owned()
+        if self._sequence is not None:
+            self._sequence = array('Q', (number for number, book in zip(self._sequence, self._books)
+                                         if book is not None))
+        self._books = [book for book in self._books if book is not None]
+        self._holes = []
+        self._positions = None
+
+    def _get_sequence(self) -> array:
+        """Ленивое построение порядковых номеров позиций списка"""
+        if self._sequence is None:
+            self._sequence = array('Q', range(len(self._books)))
+            self._next_sequence = len(self._books)
+        return self._sequence
+
+    def _append(self, book: 'Book') -> None:
+        """Добавление книги в конец списка с новым порядковым номером"""
+        if self._sequence is not None:
+            self._sequence.append(self._next_sequence)
+            self._next_sequence += 1
+        self._books.append(book)
+
+    def _position(self, index: int) -> int:
+        """Позиция в списке книги с данным индексом (с учётом надгробий)"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Индекс вне диапазона")
+        holes = self._holes
+        # Позиция = индекс + число надгробий до неё; сдвиг растёт, пока не стабилизируется
+        skipped = bisect_right(holes, index)
+        while True:
+            behind = bisect_right(holes, index + skipped)
+            if behind == skipped:
+                return index + skipped
+            skipped = behind
 
-    def __getitem__(self, key: Union[int, slice]) -> Union['Book', 'BookCollection']:
-        """Доступ по индексу или срезу"""
+    def __getitem__(self, key: Union[int, slice]) -> Union['Book', SliceView]:
+        """Доступ по индексу или срезу (срез - представление без копирования)"""
         if isinstance(key, slice):
-            return BookCollection(self._books[key])
-        return self._books[key]
+            return SliceView(self, key)
+        if not self._holes:
+            return self._books[key]
+        return self._books[self._position(key)]
 
     def __iter__(self) -> Iterator['Book']:
         """Итерация по коллекции"""
-        return iter(self._books)
+        if not self._holes:
+            return iter(self._books)
+        return (book for book in self._books if book is not None)
 
     def __len__(self) -> int:
         """Количество книг в коллекции"""
-        return len(self._books)
+        return len(self._books) - len(self._holes)
+
+    def __contains__(self, item: Any) -> bool:
+        """Проверка наличия книги (по ISBN)"""
+        if isinstance(item, Book):
+            return item.isbn in self._get_positions()
+        return any(book == item for book in self)
 
     def __repr__(self) -> str:
         """Строковое представление коллекции"""
@@ -27,26 +123,118 @@ class BookCollection:
 
     def add(self, book: 'Book') -> None:
         """Добавление книги в коллекцию"""
-        if book not in self._books:
-            self._books.append(book)
+        positions = self._get_positions()
+        if book.isbn not in positions:
+            self._ensure_owned()
+            positions[book.isbn] = len(self._books)
+            self._append(book)
+
+    def extend(self, books: Iterable['Book']) -> List['Book']:
+        """Добавление нескольких книг, возвращает действительно добавленные
+
+        Дубликаты по ISBN (с уже имеющимися и внутри пачки) пропускаются.
+        """
+        positions = self._get_positions()
+        self._ensure_owned()
+        storage = self._books
+        added = []
+        for book in books:
+            if book.isbn not in positions:
+                positions[book.isbn] = len(storage)
+                storage.append(book)
+                added.append(book)
+        if self._sequence is not None:
+            start = self._next_sequence
+            self._next_sequence += len(added)
+            self._sequence.extend(range(start, self._next_sequence))
+        return added
 
     def remove(self, book: 'Book') -> bool:
         """Удаление книги из коллекции"""
-        if book in self._books:
-            self._books.remove(book)
-            return True
-        return False
+        positions = self._get_positions()
+        position = positions.pop(book.isbn, None)
+        if position is None:
+            return False
+        self._ensure_owned()
+        if position == len(self._books) - 1:
+            self._books.pop()
+            if self._sequence is not None:
+                self._sequence.pop()
+        else:
+            self._books[position] = None
+            insort(self._holes, position)
+            # Уплотняем, когда надгробий становится больше, чем живых книг
+            if len(self._holes) > len(self._books) // 2:
+                self._compact()
+        return True
+
+    def replace_many(self, replacements: Iterable[Tuple[str, 'Book']]) -> int:
+        """Замена книг с сохранением их позиций: пары (старый ISBN, новая книга)
+
+        Сначала освобождаются все старые ISBN, затем занимаются новые,
+        поэтому пары могут обмениваться ISBN (A -> B, B -> C).
+        """
+        positions = self._get_positions()
+        self._ensure_owned()
+        placed = []
+        for old_isbn, book in replacements:
+            position = positions.pop(old_isbn, None)
+            if position is not None:
+                placed.append((position, book))
+        for position, book in placed:
+            self._books[position] = book
+            positions[book.isbn] = position
+        return len(placed)
+
+    def replace(self, old_isbn: str, book: 'Book') -> bool:
+        """Замена книги с ISBN old_isbn на book на той же позиции"""
+        return self.replace_many([(old_isbn, book)]) == 1
 
     def remove_by_index(self, index: int) -> 'Book':
         """Удаление книги по индексу"""
-        if 0 <= index < len(self._books):
-            return self._books.pop(index)
-        raise IndexError("Индекс вне диапазона")
+        if not 0 <= index < len(self):
+            raise IndexError("Индекс вне диапазона")
+        book = self._books[self._position(index)] if self._holes else self._books[index]
+        self.remove(book)
+        return book
 
     def clear(self) -> None:
         """Очистка коллекции"""
+        self._ensure_owned()
         self._books.clear()
+        self._positions = None
+        self._holes = []
+        if self._sequence is not None:
+            # Номера не переиспользуются, чтобы старые курсоры оставались корректными
+            self._sequence = array('Q')
+
+    def filter(self, predicate: Callable[['Book'], bool]) -> FilterView:
+        """Ленивое представление книг, удовлетворяющих условию"""
+        return FilterView(self, predicate)
+
+    def map(self, func: Callable[['Book'], Any]) -> MapView:
+        """Ленивое представление результатов func для каждой книги"""
+        return MapView(self, func)
+
+    def page(self, cursor: Optional[int] = None, size: int = 20) -> Page:
+        """Страница из size книг после курсора (None - с начала)"""
+        sequence = self._get_sequence()
+        start = 0 if cursor is None else bisect_right(sequence, cursor)
+        books = []
+        last = None
+        for position in range(start, len(self._books)):
+            book = self._books[position]
+            if book is None:
+                continue
+            if len(books) == size:
+                # Есть хотя бы ещё одна книга - следующая страница не пуста
+                return Page(books, last)
+            books.append(book)
+            last = sequence[position]
+        return Page(books, None)
 
     def get_books(self) -> List['Book']:
         """Получение списка всех книг"""
-        return self._books.copy()
\ No newline at end of file
+        if self._holes:
+            return [book for book in self._books if book is not None]
+        return list(self._books)
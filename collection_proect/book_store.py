@@ -0,0 +1,155 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List
+from models.book import Book
+
+
+class StringTable:
+    """Упакованная таблица строк: общий буфер UTF-8 и массив смещений"""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+    @classmethod
+    def from_buffers(cls, data, offsets) -> 'StringTable':
+        """Таблица поверх готовых буферов (например, memoryview над mmap)"""
+        table = cls.__new__(cls)
+        table._data = data
+        table._offsets = offsets
+        return table
+
+    def __len__(self) -> int:
+        """Количество строк в таблице"""
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        """Декодирование строки по номеру"""
+        return str(self._data[self._offsets[index]:self._offsets[index + 1]], 'utf-8')
+
+    def append(self, value: str) -> int:
+        """Добавление строки, возвращает её номер"""
+        self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+        return len(self._offsets) - 2
+
+    def nbytes(self) -> int:
+        """Объём памяти под данные таблицы"""
+        return len(self._data) + self._offsets.itemsize * len(self._offsets)
+
+
+class BookRow(Book):
+    """Лёгкое представление строки BookStore с интерфейсом Book
+
+    Наследование от Book нужно для проверок isinstance(..., Book)
+    (сравнение книг, BookCollection, контрольные суммы трасс). Цена -
+    пять унаследованных неиспользуемых слотов Book, 40 байт на каждое
+    представление (88 байт вместо 48). Представления создаются при
+    обращении и не хранятся, поэтому на память хранилища это не влияет.
+    """
+
+    __slots__ = ('_store', '_row')
+
+    def __init__(self, store: 'BookStore', row: int):
+        self._store = store
+        self._row = row
+
+    @property
+    def title(self) -> str:
+        """Название книги"""
+        return self._store._titles[self._row]
+
+    @property
+    def author(self) -> str:
+        """Автор книги"""
+        return self._store._authors[self._store._author_codes[self._row]]
+
+    @property
+    def year(self) -> int:
+        """Год издания"""
+        return self._store._years[self._row]
+
+    @property
+    def genre(self) -> str:
+        """Жанр книги"""
+        return self._store._genres[self._store._genre_codes[self._row]]
+
+    @property
+    def isbn(self) -> str:
+        """ISBN книги"""
+        return self._store._isbns[self._row]
+
+
+class BookStore:
+    """Колоночное хранилище книг
+
+    Годы лежат в array('i') (год может быть отрицательным), авторы и жанры - в виде небольших целых
+    кодов словаря, названия и ISBN - в упакованных таблицах строк.
+    Наружу выдаются представления BookRow, совместимые с Book.
+    """
+
+    def __init__(self, books: Iterable['Book'] = ()):
+        self._years = array('i')
+        self._author_codes = array('I')
+        self._genre_codes = array('H')
+        self._authors: List[str] = []
+        self._author_ids: Dict[str, int] = {}
+        self._genres: List[str] = []
+        self._genre_ids: Dict[str, int] = {}
+        self._titles = StringTable()
+        self._isbns = StringTable()
+        self.extend(books)
+
+    def __len__(self) -> int:
+        """Количество книг в хранилище"""
+        return len(self._years)
+
+    def __getitem__(self, row: int) -> BookRow:
+        """Представление книги по номеру строки"""
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("Индекс вне диапазона")
+        return BookRow(self, row)
+
+    def __iter__(self) -> Iterator[BookRow]:
+        """Итерация по представлениям книг"""
+        for row in range(len(self)):
+            yield BookRow(self, row)
+
+    def __repr__(self) -> str:
+        """Строковое представление хранилища"""
+        return f"BookStore({len(self)} книг, {len(self._authors)} авторов)"
+
+    @staticmethod
+    def _encode(value: str, ids: Dict[str, int], values: List[str]) -> int:
+        """Код строки в словаре (с добавлением новой строки)"""
+        code = ids.get(value)
+        if code is None:
+            code = ids[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, book: 'Book') -> int:
+        """Добавление книги, возвращает номер строки"""
+        self._years.append(book.year)
+        self._author_codes.append(self._encode(book.author, self._author_ids, self._authors))
+        self._genre_codes.append(self._encode(book.genre, self._genre_ids, self._genres))
+        self._titles.append(book.title)
+        return self._isbns.append(book.isbn)
+
+    def extend(self, books: Iterable['Book']) -> None:
+        """Добавление нескольких книг"""
+        for book in books:
+            self.append(book)
+
+    def to_book(self, row: int) -> Book:
+        """Материализация строки в самостоятельный объект Book"""
+        view = self[row]
+        return Book(view.title, view.author, view.year, view.genre, view.isbn)
+
+    def nbytes(self) -> int:
+        """Приблизительный объём памяти под колонки (без словарей)"""
+        return (self._years.itemsize * len(self._years)
+                + self._author_codes.itemsize * len(self._author_codes)
+                + self._genre_codes.itemsize * len(self._genre_codes)
+                + self._titles.nbytes() + self._isbns.nbytes())
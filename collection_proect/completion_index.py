@@ -0,0 +1,222 @@
+from bisect import bisect_left, insort
+from heapq import nsmallest
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+# Символ больше любого другого: prefix + LAST ограничивает сверху все строки с префиксом
+LAST = '\U0010ffff'
+
+
+def normalize(text: str) -> str:
+    """Нормализация строки для поиска: регистр, ё и лишние пробелы"""
+    normalized = ' '.join(text.casefold().replace('ё', 'е').split())
+    # Завершающий пробел значим для автодополнения: "лев " - начало следующего слова
+    if normalized and text[-1:].isspace():
+        normalized += ' '
+    return normalized
+
+
+class CompletionIndex:
+    """Индекс автодополнения и нечёткого поиска по строковому полю
+
+    Нормализованные термы (вся строка или, при word_starts=True, также
+    хвосты, начинающиеся с каждого слова) лежат в отсортированном списке,
+    поэтому все термы с данным префиксом находятся двумя bisect.
+    Для префиксов с большим числом термов лучшие TOP значений кэшируются
+    и поправляются при каждом изменении счётчика книг.
+
+    Нечёткий поиск обходит тот же список как префиксное дерево: строки
+    матрицы Левенштейна для общего префикса соседних термов переиспользуются,
+    а все термы с префиксом, который уже дальше max_distance, пропускаются.
+    """
+
+    TOP = 16
+    # Пачки не больше этого размера add_many учитывает по одной книге
+    SMALL_BATCH = 64
+    # До стольких термов диапазон ранжируется на лету, без кэша
+    SCAN_LIMIT = 64
+
+    def __init__(self, word_starts: bool = False):
+        self.word_starts = word_starts
+        self._counts: Dict[str, int] = {}
+        self._terms: Dict[str, Set[str]] = {}
+        self._sorted_terms: List[str] = []
+        self._top: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        """Количество различных значений"""
+        return len(self._counts)
+
+    def _terms_of(self, value: str) -> Set[str]:
+        """Термы значения"""
+        normalized = normalize(value).rstrip()
+        if not self.word_starts:
+            return {normalized}
+        return {normalized[i + 1:] for i, char in enumerate(normalized) if char == ' '} | {normalized}
+
+    def _rank_key(self, value: str) -> Tuple[int, str]:
+        """Ключ сортировки: больше книг - выше, затем по алфавиту"""
+        return -self._counts.get(value, 0), value
+
+    def add(self, value: str) -> None:
+        """Учёт ещё одной книги со значением value"""
+        count = self._counts.get(value, 0)
+        self._counts[value] = count + 1
+        if not count:
+            for term in self._terms_of(value):
+                values = self._terms.get(term)
+                if values is None:
+                    self._terms[term] = {value}
+                    insort(self._sorted_terms, term)
+                else:
+                    values.add(value)
+        self._rerank(value, increased=True)
+
+    def add_many(self, values: Iterable[str]) -> None:
+        """Пакетный учёт книг: список термов сортируется один раз в конце"""
+        values = list(values)
+        if len(values) <= self.SMALL_BATCH:
+            for value in values:
+                self.add(value)
+            return
+        new_terms = []
+        for value in values:
+            count = self._counts.get(value, 0)
+            self._counts[value] = count + 1
+            if count:
+                continue
+            for term in self._terms_of(value):
+                if term in self._terms:
+                    self._terms[term].add(value)
+                else:
+                    self._terms[term] = {value}
+                    new_terms.append(term)
+        if new_terms:
+            # Timsort сливает уже отсортированный список с новой частью за линейное время
+            self._sorted_terms.extend(sorted(new_terms))
+            self._sorted_terms.sort()
+        self._top.clear()
+
+    def remove(self, value: str) -> None:
+        """Учёт удаления одной книги со значением value"""
+        count = self._counts.get(value)
+        if not count:
+            return
+        if count > 1:
+            self._counts[value] = count - 1
+        else:
+            del self._counts[value]
+            for term in self._terms_of(value):
+                values = self._terms[term]
+                values.discard(value)
+                if not values:
+                    del self._terms[term]
+                    del self._sorted_terms[bisect_left(self._sorted_terms, term)]
+        self._rerank(value, increased=False)
+
+    def _rerank(self, value: str, increased: bool) -> None:
+        """Поправка закэшированных списков лучших значений"""
+        if not self._top:
+            return
+        key = self._rank_key
+        for term in self._terms_of(value):
+            for length in range(len(term) + 1):
+                top = self._top.get(term[:length])
+                if top is None:
+                    continue
+                if increased:
+                    if value in top:
+                        top.sort(key=key)
+                    elif len(top) < self.TOP or key(value) < key(top[-1]):
+                        # Неполный список содержит все значения с этим префиксом
+                        if len(top) == self.TOP:
+                            top.pop()
+                        top.append(value)
+                        top.sort(key=key)
+                elif value in top:
+                    if len(top) < self.TOP:
+                        if value in self._counts:
+                            top.sort(key=key)
+                        else:
+                            top.remove(value)
+                    else:
+                        # На освободившееся место может претендовать значение вне списка
+                        del self._top[term[:length]]
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        """Границы термов с префиксом в отсортированном списке"""
+        lo = bisect_left(self._sorted_terms, prefix)
+        return lo, bisect_left(self._sorted_terms, prefix + LAST, lo)
+
+    def _best(self, lo: int, hi: int, k: int) -> List[str]:
+        """Лучшие k значений среди термов диапазона"""
+        candidates = set()
+        for term in self._sorted_terms[lo:hi]:
+            candidates.update(self._terms[term])
+        return nsmallest(k, candidates, key=self._rank_key)
+
+    def count(self, value: str) -> int:
+        """Число книг со значением value"""
+        return self._counts.get(value, 0)
+
+    def complete(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """k значений с наибольшим числом книг, начинающихся с prefix
+
+        При word_starts=True подходит и совпадение с началом любого слова.
+        """
+        prefix = normalize(prefix)
+        lo, hi = self._range(prefix)
+        if k > self.TOP or hi - lo <= self.SCAN_LIMIT:
+            best = self._best(lo, hi, k)
+        else:
+            top = self._top.get(prefix)
+            if top is None:
+                top = self._top[prefix] = self._best(lo, hi, self.TOP)
+            best = top[:k]
+        return [(value, self._counts[value]) for value in best]
+
+    def fuzzy(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Значения с термом на расстоянии Левенштейна не больше max_distance
+
+        Сортировка по расстоянию, затем по числу книг.
+        """
+        query = normalize(text).rstrip()
+        terms = self._sorted_terms
+        size = len(query)
+        rows = [list(range(size + 1))]
+        path = ''
+        distances: Dict[str, int] = {}
+        i = 0
+        while i < len(terms):
+            term = terms[i]
+            common = 0
+            limit = min(len(path), len(term))
+            while common < limit and path[common] == term[common]:
+                common += 1
+            del rows[common + 1:]
+            pruned = False
+            for depth in range(common, len(term)):
+                char = term[depth]
+                previous = rows[-1]
+                row = [previous[0] + 1]
+                for j in range(1, size + 1):
+                    row.append(min(row[j - 1] + 1, previous[j] + 1,
+                                   previous[j - 1] + (query[j - 1] != char)))
+                rows.append(row)
+                if min(row) > max_distance:
+                    # Ни один терм с этим префиксом не подходит
+                    path = term[:depth + 1]
+                    i = bisect_left(terms, path + LAST, i)
+                    pruned = True
+                    break
+            if pruned:
+                continue
+            path = term
+            distance = rows[-1][size]
+            if distance <= max_distance:
+                for value in self._terms[term]:
+                    if distance < distances.get(value, max_distance + 1):
+                        distances[value] = distance
+            i += 1
+        best = nsmallest(k, distances, key=lambda value: (distances[value],) + self._rank_key(value))
+        return [(value, self._counts[value]) for value in best]
@@ -1,24 +1,94 @@
-from typing import Dict, List, Any, Union
+from typing import Dict, List, Any, Union, Set, Optional, Iterable, Iterator, Tuple
+from array import array
 from collections import defaultdict
+from functools import partial
+from bisect import bisect_left, bisect_right, insort
+from heapq import nlargest
+from itertools import islice
+from collection_proect.completion_index import CompletionIndex
+
+
+# Поля книги, которые может изменить обновление
+FIELDS = ('title', 'author', 'year', 'genre', 'isbn')
+# Поля, по которым книги разложены в списки индексов
+LIST_FIELDS = ('author', 'year', 'genre')
+# Диапазон лет шире стольких десятилетий зависит от всех изменений
+MAX_RANGE_DECADES = 32
+
+
+def make_trigrams(text: str) -> Set[str]:
+    """Множество триграмм строки"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _discard(postings: array, row: int) -> None:
+    """Удаление строки из отсортированного массива записей"""
+    i = bisect_left(postings, row)
+    if i < len(postings) and postings[i] == row:
+        del postings[i]
+
+
+def _contains(postings: array, row: int) -> bool:
+    """Проверка строки в отсортированном массиве записей"""
+    i = bisect_left(postings, row)
+    return i < len(postings) and postings[i] == row
 
 
 class IndexDict:
-    """Пользовательская словарная коллекция для индексации книг"""
+    """Пользовательская словарная коллекция для индексации книг
+
+    Книги лежат в списке строк в порядке добавления (удалённые строки -
+    None до уплотнения), индекс по ISBN хранит номер строки. Обновление
+    на месте строку не меняет, поэтому порядок строк совпадает с порядком
+    коллекции. Кроме индексов по ISBN, автору, году и жанру поддерживается
+    инвертированный индекс триграмм текста всех полей книги (триграмма ->
+    отсортированный массив номеров строк array('I'), 4 байта на запись);
+    результаты текстового поиска упорядочены по строкам, то есть идут
+    в том же порядке, что и при полном просмотре коллекции.
+
+    Триграммы книг, добавленных пакетно (add_books), строятся отложенно,
+    при первом текстовом поиске: это строки от _trigram_rows до конца.
+    Удаление или обновление такой книги индекс триграмм не затрагивает.
+
+    Годы дополнительно хранятся в отсортированном списке ключей, что
+    позволяет отвечать на запросы по диапазону лет через bisect.
+
+    Для кэша запросов каждый ключ индекса (автор, жанр, год, десятилетие,
+    триграмма) имеет счётчик поколений, который увеличивается при любом
+    изменении книг с этим ключом.
+
+    Индексы автодополнения по авторам и названиям строятся при первом
+    обращении к ним и после этого поддерживаются при каждом изменении.
+    """
 
     def __init__(self):
-        self._index_by_isbn: Dict[str, 'Book'] = {}
+        self._rows: List[Optional['Book']] = []
+        self._dead_rows = 0
+        self._row_by_isbn: Dict[str, int] = {}
         self._index_by_author: Dict[str, List['Book']] = defaultdict(list)
         self._index_by_year: Dict[int, List['Book']] = defaultdict(list)
         self._index_by_genre: Dict[str, List['Book']] = defaultdict(list)
+        self._index_by_trigram: Dict[str, array] = defaultdict(partial(array, 'I'))
+        # Строки с этой и дальше ещё не попали в индекс триграмм
+        self._trigram_rows = 0
+        self._sorted_years: List[int] = []
+        self._decade_counts: Dict[int, int] = defaultdict(int)
+        self._generations: Dict[tuple, int] = {}
+        self._author_completion: Optional[CompletionIndex] = None
+        self._title_completion: Optional[CompletionIndex] = None
 
     def __getitem__(self, key: Any) -> Union['Book', List['Book']]:
         """Доступ к индексу по ключу"""
-        if isinstance(key, str) and key in self._index_by_isbn:
-            return self._index_by_isbn[key]
+        if isinstance(key, str) and key in self._row_by_isbn:
+            return self._rows[self._row_by_isbn[key]]
+        elif isinstance(key, tuple) and len(key) == 3 and key[0] == 'year_range':
+            return self.search_by_year_range(key[1], key[2])
         elif isinstance(key, tuple):
             index_type, value = key
             if index_type == 'author':
                 return self._index_by_author.get(value, [])
+            elif index_type == 'year' and isinstance(value, slice):
+                return self.search_by_year_range(value.start, value.stop)
             elif index_type == 'year':
                 return self._index_by_year.get(value, [])
             elif index_type == 'genre':
@@ -35,50 +105,375 @@ class IndexDict:
 
     def __len__(self) -> int:
         """Количество уникальных книг в индексе"""
-        return len(self._index_by_isbn)
+        return len(self._row_by_isbn)
 
     def __iter__(self):
         """Итерация по ISBN"""
-        return iter(self._index_by_isbn)
+        return iter(self._row_by_isbn)
 
     def __repr__(self) -> str:
         """Строковое представление индекса"""
         return f"IndexDict({len(self)} книг, {len(self._index_by_author)} авторов)"
 
+    def _bump(self, book: 'Book') -> None:
+        """Новое поколение ключей книги"""
+        generations = self._generations
+        for key in (('author', book.author), ('genre', book.genre), ('year', book.year),
+                    ('decade', book.year // 10 * 10), ('all',)):
+            generations[key] = generations.get(key, 0) + 1
+
+    def _books(self) -> Iterator['Book']:
+        """Книги в порядке строк (порядок коллекции)"""
+        return (book for book in self._rows if book is not None)
+
+    def _add_row(self, book: 'Book') -> int:
+        """Новая строка для книги"""
+        row = len(self._rows)
+        self._rows.append(book)
+        self._row_by_isbn[book.isbn] = row
+        return row
+
+    def _release_row(self, row: int) -> None:
+        """Освобождение строки удалённой книги (ISBN уже снят с индекса)"""
+        self._rows[row] = None
+        self._dead_rows += 1
+        # Уплотняем, когда пустых строк становится больше, чем живых
+        if self._dead_rows > len(self._rows) // 2:
+            self._compact_rows()
+
+    def _compact_rows(self) -> None:
+        """Уплотнение строк с перенумерацией записей индекса триграмм"""
+        renumbered = array('I', bytes(4 * len(self._rows)))
+        rows = []
+        indexed = None
+        for row, book in enumerate(self._rows):
+            if row == self._trigram_rows:
+                indexed = len(rows)
+            if book is not None:
+                renumbered[row] = len(rows)
+                rows.append(book)
+        self._trigram_rows = len(rows) if indexed is None else indexed
+        self._rows = rows
+        self._dead_rows = 0
+        self._row_by_isbn = {book.isbn: row for row, book in enumerate(rows)}
+        by_trigram = self._index_by_trigram
+        for trigram, postings in by_trigram.items():
+            by_trigram[trigram] = array('I', map(renumbered.__getitem__, postings))
+
     def add_book(self, book: 'Book') -> None:
         """Добавление книги во все индексы"""
-        self._index_by_isbn[book.isbn] = book
+        self._bump(book)
+        row = self._add_row(book)
         self._index_by_author[book.author].append(book)
+        if book.year not in self._index_by_year:
+            insort(self._sorted_years, book.year)
         self._index_by_year[book.year].append(book)
+        self._decade_counts[book.year // 10 * 10] += 1
         self._index_by_genre[book.genre].append(book)
+        if self._trigram_rows == row:
+            self._add_trigrams(book, row)
+            self._trigram_rows = row + 1
+        if self._author_completion is not None:
+            self._author_completion.add(book.author)
+        if self._title_completion is not None:
+            self._title_completion.add(book.title)
+
+    def _add_trigrams(self, book: 'Book', row: int) -> None:
+        """Добавление книги в индекс триграмм
+
+        Строка новой книги больше всех строк в индексе, поэтому массивы
+        записей остаются отсортированными.
+        """
+        generations = self._generations
+        for trigram in make_trigrams(book.get_search_text()):
+            self._index_by_trigram[trigram].append(row)
+            key = ('trigram', trigram)
+            generations[key] = generations.get(key, 0) + 1
+
+    def _flush_trigrams(self) -> None:
+        """Построение отложенной части индекса триграмм"""
+        rows = self._rows
+        for row in range(self._trigram_rows, len(rows)):
+            if rows[row] is not None:
+                self._add_trigrams(rows[row], row)
+        self._trigram_rows = len(rows)
+
+    def add_books(self, books: Iterable['Book']) -> None:
+        """Пакетное добавление книг во все индексы
+
+        Отсортированный список лет перестраивается один раз в конце пачки,
+        индекс триграмм строится отложенно.
+        """
+        add_row = self._add_row
+        by_author = self._index_by_author
+        by_year = self._index_by_year
+        by_genre = self._index_by_genre
+        decade_counts = self._decade_counts
+        years_before = len(by_year)
+        start = len(self._rows)
+        for book in books:
+            self._bump(book)
+            add_row(book)
+            by_author[book.author].append(book)
+            by_year[book.year].append(book)
+            by_genre[book.genre].append(book)
+            decade_counts[book.year // 10 * 10] += 1
+        if len(by_year) != years_before:
+            self._sorted_years = sorted(by_year)
+        if self._author_completion is not None:
+            self._author_completion.add_many(book.author for book in self._rows[start:])
+        if self._title_completion is not None:
+            self._title_completion.add_many(book.title for book in self._rows[start:])
 
     def remove_book(self, book: 'Book') -> bool:
-        """Удаление книги из всех индексов"""
-        if book.isbn in self._index_by_isbn:
-            del self._index_by_isbn[book.isbn]
-
-            if book in self._index_by_author[book.author]:
-                self._index_by_author[book.author].remove(book)
-                if not self._index_by_author[book.author]:
-                    del self._index_by_author[book.author]
-
-            if book in self._index_by_year[book.year]:
-                self._index_by_year[book.year].remove(book)
-                if not self._index_by_year[book.year]:
-                    del self._index_by_year[book.year]
-
-            if book in self._index_by_genre[book.genre]:
-                self._index_by_genre[book.genre].remove(book)
-                if not self._index_by_genre[book.genre]:
-                    del self._index_by_genre[book.genre]
-
-            return True
-        return False
+        """Удаление книги из всех индексов
+
+        Книга ищется по ISBN, а индексы чистятся по хранимой книге:
+        остальные поля аргумента могут от неё отличаться.
+        """
+        row = self._row_by_isbn.get(book.isbn)
+        if row is None:
+            return False
+        stored = self._rows[row]
+        self._bump(stored)
+        for field in LIST_FIELDS:
+            index = self._lists(field)
+            key = getattr(stored, field)
+            books = index.get(key)
+            if books is None:
+                continue
+            del books[self._locate(books, row)]
+            if not books:
+                del index[key]
+                if field == 'year':
+                    del self._sorted_years[bisect_left(self._sorted_years, key)]
+        decade = stored.year // 10 * 10
+        self._decade_counts[decade] -= 1
+        if not self._decade_counts[decade]:
+            del self._decade_counts[decade]
+        del self._row_by_isbn[stored.isbn]
+        self._remove_trigrams(stored, row)
+        self._release_row(row)
+        if self._author_completion is not None:
+            self._author_completion.remove(stored.author)
+        if self._title_completion is not None:
+            self._title_completion.remove(stored.title)
+        return True
+
+    def _remove_trigrams(self, book: 'Book', row: int) -> None:
+        """Удаление книги из индекса триграмм"""
+        if row >= self._trigram_rows:
+            return
+        generations = self._generations
+        for trigram in make_trigrams(book.get_search_text()):
+            key = ('trigram', trigram)
+            generations[key] = generations.get(key, 0) + 1
+            postings = self._index_by_trigram.get(trigram)
+            if postings is not None:
+                _discard(postings, row)
+                if not postings:
+                    del self._index_by_trigram[trigram]
+
+    def _lists(self, field: str) -> Dict[Any, List['Book']]:
+        """Индекс со списками книг по полю author, year или genre"""
+        return {'author': self._index_by_author, 'year': self._index_by_year,
+                'genre': self._index_by_genre}[field]
+
+    def _detach(self, detached: List[Tuple['Book', Tuple[str, ...]]]) -> None:
+        """Пакетное исключение книг из списков индексов по указанным полям
+
+        Каждый затронутый список проходится один раз, сколько бы книг
+        из него ни удалялось; список заменяется новым.
+        """
+        doomed: Dict[Tuple[str, Any], Set[int]] = defaultdict(set)
+        for book, fields in detached:
+            for field in fields:
+                doomed[(field, getattr(book, field))].add(id(book))
+            if 'year' in fields:
+                decade = book.year // 10 * 10
+                self._decade_counts[decade] -= 1
+                if not self._decade_counts[decade]:
+                    del self._decade_counts[decade]
+        for (field, key), ids in doomed.items():
+            index = self._lists(field)
+            books = index.get(key)
+            if books is None:
+                continue
+            kept = [book for book in books if id(book) not in ids]
+            if kept:
+                index[key] = kept
+            else:
+                del index[key]
+                if field == 'year':
+                    del self._sorted_years[bisect_left(self._sorted_years, key)]
+
+    def _locate(self, books: List['Book'], row: int) -> int:
+        """Позиция первой книги списка со строкой не меньше row
+
+        Списки авторов, лет и жанров упорядочены по строкам книг
+        (то есть в порядке коллекции), поэтому поиск - двоичный.
+        """
+        rows = self._row_by_isbn
+        lo, hi = 0, len(books)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if rows[books[mid].isbn] < row:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def remove_books(self, books: Iterable['Book']) -> int:
+        """Пакетное удаление книг, возвращает число удалённых"""
+        detached = []
+        for book in books:
+            row = self._row_by_isbn.pop(book.isbn, None)
+            if row is None:
+                continue
+            stored = self._rows[row]
+            self._bump(stored)
+            self._remove_trigrams(stored, row)
+            self._release_row(row)
+            if self._author_completion is not None:
+                self._author_completion.remove(stored.author)
+            if self._title_completion is not None:
+                self._title_completion.remove(stored.title)
+            detached.append((stored, LIST_FIELDS))
+        self._detach(detached)
+        return len(detached)
+
+    def update_books(self, changes: Iterable[Tuple['Book', 'Book']]) -> int:
+        """Пакетная замена книг новыми с сохранением строк, возвращает число заменённых
+
+        Каждая пара - (книга из индекса, книга с новыми значениями полей).
+        Новая книга занимает строку старой и её места в списках ключей,
+        которые не изменились; между списками она переносится только по
+        изменившимся ключам, а в индексе триграмм правятся только появившиеся
+        и исчезнувшие триграммы. Объекты книг не изменяются: та же книга
+        может храниться и в другой библиотеке.
+
+        Пачка сначала проверяется целиком: если книги нет в индексе или
+        новый ISBN занят, возникает ValueError и индекс не меняется.
+        """
+        changes = list(changes)
+        vacated = {book.isbn for book, new_book in changes if book.isbn != new_book.isbn}
+        claimed = set()
+        planned = []
+        # Правки списков: (поле, ключ) -> [(позиция старой книги, замена или None)]
+        edits: Dict[Tuple[str, Any], List[Tuple[int, Optional['Book']]]] = defaultdict(list)
+        for book, new_book in changes:
+            row = self._row_by_isbn.get(book.isbn)
+            if row is None:
+                raise ValueError(f"Книги с ISBN {book.isbn} нет в индексе")
+            if new_book.isbn != book.isbn:
+                if new_book.isbn in claimed or (new_book.isbn in self._row_by_isbn
+                                                and new_book.isbn not in vacated):
+                    raise ValueError(f"ISBN {new_book.isbn} уже занят")
+                claimed.add(new_book.isbn)
+            stored = self._rows[row]
+            fields = tuple(field for field in FIELDS
+                           if getattr(stored, field) != getattr(new_book, field))
+            for field in LIST_FIELDS:
+                key = getattr(stored, field)
+                position = self._locate(self._lists(field)[key], row)
+                edits[(field, key)].append((position, None if field in fields else new_book))
+            # Триграммы отложенной книги построятся позже, уже по новому тексту
+            trigrams = (make_trigrams(stored.get_search_text())
+                        if fields and row < self._trigram_rows else None)
+            planned.append((stored, new_book, fields, trigrams, row))
+
+        for stored, new_book, fields, _, _ in planned:
+            self._bump(stored)
+            if 'year' in fields:
+                decade = stored.year // 10 * 10
+                self._decade_counts[decade] -= 1
+                if not self._decade_counts[decade]:
+                    del self._decade_counts[decade]
+            if 'author' in fields and self._author_completion is not None:
+                self._author_completion.remove(stored.author)
+            if 'title' in fields and self._title_completion is not None:
+                self._title_completion.remove(stored.title)
+        for (field, key), positions in edits.items():
+            index = self._lists(field)
+            books = index[key]
+            for position, replacement in positions:
+                if replacement is not None:
+                    books[position] = replacement
+            for position in sorted((position for position, replacement in positions
+                                    if replacement is None), reverse=True):
+                del books[position]
+            if not books:
+                del index[key]
+                if field == 'year':
+                    del self._sorted_years[bisect_left(self._sorted_years, key)]
+        for stored, new_book, fields, _, _ in planned:
+            if 'isbn' in fields:
+                del self._row_by_isbn[stored.isbn]
+        for _, new_book, _, _, row in planned:
+            self._rows[row] = new_book
+            self._row_by_isbn[new_book.isbn] = row
+
+        retrigrammed = []
+        for _, new_book, fields, trigrams, row in planned:
+            self._bump(new_book)
+            for field in LIST_FIELDS:
+                if field in fields:
+                    books = self._lists(field)[getattr(new_book, field)]
+                    books.insert(self._locate(books, row), new_book)
+                    if field == 'year' and len(books) == 1:
+                        insort(self._sorted_years, new_book.year)
+            if 'year' in fields:
+                self._decade_counts[new_book.year // 10 * 10] += 1
+            if trigrams is not None:
+                retrigrammed.append((new_book, row, trigrams))
+        touched = self._retrigram(retrigrammed)
+        # Поколение триграммы достаточно увеличить один раз на пачку
+        generations = self._generations
+        for trigram in touched:
+            key = ('trigram', trigram)
+            generations[key] = generations.get(key, 0) + 1
+        if self._author_completion is not None:
+            self._author_completion.add_many(new_book.author for _, new_book, fields, _, _ in planned
+                                             if 'author' in fields)
+        if self._title_completion is not None:
+            self._title_completion.add_many(new_book.title for _, new_book, fields, _, _ in planned
+                                            if 'title' in fields)
+        return len(planned)
+
+    def _retrigram(self, changes: List[Tuple['Book', int, Set[str]]]) -> Set[str]:
+        """Правка индекса триграмм после изменения текста книг
+
+        changes - тройки (книга с новыми значениями, её строка, старые
+        триграммы). Записи индекса - номера строк, поэтому смена ISBN
+        их не затрагивает, а правятся только исчезнувшие и появившиеся
+        триграммы. Возвращает все старые и новые триграммы - их поколения
+        нужно увеличить: совпадение подстроки могло измениться и при тех
+        же триграммах.
+        """
+        by_trigram = self._index_by_trigram
+        touched: Set[str] = set()
+        for book, row, old_trigrams in changes:
+            trigrams = make_trigrams(book.get_search_text())
+            for trigram in old_trigrams - trigrams:
+                postings = by_trigram.get(trigram)
+                if postings is not None:
+                    _discard(postings, row)
+                    if not postings:
+                        del by_trigram[trigram]
+            for trigram in trigrams - old_trigrams:
+                insort(by_trigram[trigram], row)
+            touched |= old_trigrams
+            touched |= trigrams
+        return touched
+
+    def update_book(self, book: 'Book', new_book: 'Book') -> bool:
+        """Замена книги новой с сохранением строки (см. update_books)"""
+        return self.update_books([(book, new_book)]) == 1
 
     def remove_book_by_isbn(self, isbn: str) -> bool:
         """Удаление книги по ISBN"""
-        if isbn in self._index_by_isbn:
-            book = self._index_by_isbn[isbn]
+        if isbn in self._row_by_isbn:
+            book = self._rows[self._row_by_isbn[isbn]]
             return self.remove_book(book)
         return False
 
@@ -90,13 +485,293 @@ class IndexDict:
         """Поиск книг по году"""
         return self._index_by_year.get(year, [])
 
+    def search_by_year_range(self, start: Optional[int] = None,
+                             end: Optional[int] = None) -> List['Book']:
+        """Поиск книг, изданных с start по end включительно
+
+        Границы None означают открытый диапазон. Книги упорядочены по году.
+        """
+        result = []
+        for year in self._years_between(start, end):
+            result.extend(self._index_by_year[year])
+        return result
+
+    def _years_between(self, start: Optional[int], end: Optional[int]) -> List[int]:
+        """Отсортированные годы из индекса в диапазоне [start, end]"""
+        lo = 0 if start is None else bisect_left(self._sorted_years, start)
+        hi = len(self._sorted_years) if end is None else bisect_right(self._sorted_years, end)
+        return self._sorted_years[lo:hi]
+
+    def years(self) -> List[int]:
+        """Отсортированный список лет, для которых есть книги"""
+        return list(self._sorted_years)
+
+    def authors(self) -> List[str]:
+        """Авторы, у которых есть книги"""
+        return list(self._index_by_author)
+
+    def genres(self) -> List[str]:
+        """Жанры, в которых есть книги"""
+        return list(self._index_by_genre)
+
+    def min_year(self) -> Optional[int]:
+        """Самый ранний год издания"""
+        return self._sorted_years[0] if self._sorted_years else None
+
+    def max_year(self) -> Optional[int]:
+        """Самый поздний год издания"""
+        return self._sorted_years[-1] if self._sorted_years else None
+
+    def count_by_decade(self) -> Dict[int, int]:
+        """Количество книг по десятилетиям (ключ - первый год десятилетия)"""
+        return dict(sorted(self._decade_counts.items()))
+
+    def count_by_genre(self) -> Dict[str, int]:
+        """Количество книг по жанрам"""
+        return {genre: len(books) for genre, books in self._index_by_genre.items()}
+
+    def count_by_author(self, top: Optional[int] = None) -> Dict[str, int]:
+        """Количество книг по авторам (top - только самые крупные)"""
+        if top is None:
+            return {author: len(books) for author, books in self._index_by_author.items()}
+        largest = nlargest(top, self._index_by_author.items(), key=lambda item: len(item[1]))
+        return {author: len(books) for author, books in largest}
+
+    def get_statistics(self, detail: Union[str, Iterable[str], None] = None,
+                       top: int = 10) -> dict:
+        """Сводная статистика индексов
+
+        Базовые показатели берутся из уже поддерживаемых структур
+        (размеры словарей, концы отсортированного списка лет) за O(1),
+        раздел 'genres' (жанр -> число книг; итерация даёт жанры, как
+        прежний список) - за O(число жанров), он есть всегда.
+        detail добавляет разделы: 'authors' (top авторов), 'decades',
+        'years'; их стоимость пропорциональна размеру раздела.
+        """
+        statistics = {
+            'total_books': len(self._row_by_isbn),
+            'total_authors': len(self._index_by_author),
+            'total_genres': len(self._index_by_genre),
+            'years_range': (self.min_year(), self.max_year()),
+            'genres': self.count_by_genre(),
+        }
+        details = {detail} if isinstance(detail, str) else set(detail or ())
+        if 'authors' in details:
+            statistics['authors'] = self.count_by_author(top)
+        if 'decades' in details:
+            statistics['decades'] = self.count_by_decade()
+        if 'years' in details:
+            statistics['years'] = self.years()
+        unknown = details - {'genres', 'authors', 'decades', 'years'}
+        if unknown:
+            raise KeyError(f"Неизвестные разделы статистики: {', '.join(sorted(unknown))}")
+        return statistics
+
     def search_by_genre(self, genre: str) -> List['Book']:
         """Поиск книг по жанру"""
         return self._index_by_genre.get(genre, [])
 
     def search_by_isbn(self, isbn: str) -> 'Book':
         """Поиск книги по ISBN"""
-        return self._index_by_isbn.get(isbn)
+        row = self._row_by_isbn.get(isbn)
+        return None if row is None else self._rows[row]
+
+    def _text_candidates(self, query: str) -> List['Book']:
+        """Кандидаты, текст которых содержит все триграммы запроса"""
+        trigrams = make_trigrams(query)
+        if not trigrams:
+            return list(self._books())
+        self._flush_trigrams()
+        postings = []
+        for trigram in trigrams:
+            rows = self._index_by_trigram.get(trigram)
+            if not rows:
+                return []
+            postings.append(rows)
+        # Пересечение начинаем с самого короткого массива: в длинных
+        # строки ищутся через bisect, сопоставимые по длине пересекаются множеством
+        postings.sort(key=len)
+        found = set(postings[0])
+        for other in postings[1:]:
+            if not found:
+                break
+            if len(found) * 16 < len(other):
+                found = {row for row in found if _contains(other, row)}
+            else:
+                found.intersection_update(other)
+        return [self._rows[row] for row in sorted(found)]
+
+    def search_by_title(self, title_part: str) -> List['Book']:
+        """Поиск книг по части названия (без учёта регистра)"""
+        query = title_part.lower()
+        return [book for book in self._text_candidates(query)
+                if query in book.title.lower()]
+
+    def search_text(self, query: str) -> List['Book']:
+        """Поиск книг по подстроке в любом поле (как Book.__contains__)"""
+        query = query.lower()
+        return [book for book in self._text_candidates(query)
+                if query in book.get_search_text()]
+
+    def _completion(self, field: str) -> CompletionIndex:
+        """Индекс автодополнения по полю (строится при первом обращении)"""
+        if field == 'author':
+            if self._author_completion is None:
+                completion = CompletionIndex(word_starts=True)
+                completion.add_many(book.author for book in self._books())
+                self._author_completion = completion
+            return self._author_completion
+        if field == 'title':
+            if self._title_completion is None:
+                completion = CompletionIndex()
+                completion.add_many(book.title for book in self._books())
+                self._title_completion = completion
+            return self._title_completion
+        raise KeyError(f"Нет индекса автодополнения для поля {field}")
+
+    def complete_author(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Авторы, имя или фамилия которых начинается с prefix, с числом книг"""
+        return self._completion('author').complete(prefix, k)
+
+    def complete_title(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Названия, начинающиеся с prefix, с числом книг"""
+        return self._completion('title').complete(prefix, k)
+
+    def completion_counts(self, field: str, values: Iterable[str]) -> List[int]:
+        """Число книг для каждого из значений поля (по индексу автодополнения)"""
+        completion = self._completion(field)
+        return [completion.count(value) for value in values]
+
+    def fuzzy_author(self, text: str, max_distance: int = 2,
+                     k: int = 10) -> List[Tuple[str, int]]:
+        """Авторы, отличающиеся от text не больше чем на max_distance правок"""
+        return self._completion('author').fuzzy(text, max_distance, k)
+
+    def fuzzy_title(self, text: str, max_distance: int = 2,
+                    k: int = 10) -> List[Tuple[str, int]]:
+        """Названия, отличающиеся от text не больше чем на max_distance правок"""
+        return self._completion('title').fuzzy(text, max_distance, k)
+
+    def _estimate(self, name: str, value: Any) -> int:
+        """Оценка числа книг, отбираемых одним условием запроса
+
+        Статистикой служат длины списков индексов: для автора, жанра
+        и года она точна, для подстроки названия - это верхняя граница
+        по самой короткой триграмме.
+        """
+        if name == 'author':
+            return len(self._index_by_author.get(value, ()))
+        if name == 'genre':
+            return len(self._index_by_genre.get(value, ()))
+        if name == 'year':
+            return len(self._index_by_year.get(value, ()))
+        if name == 'year_range':
+            return sum(len(self._index_by_year[year]) for year in self._years_between(*value))
+        if name == 'title_contains':
+            trigrams = make_trigrams(value.lower())
+            if not trigrams:
+                return len(self)
+            self._flush_trigrams()
+            return min(len(self._index_by_trigram.get(trigram, ())) for trigram in trigrams)
+        raise KeyError(f"Неизвестное условие {name}")
+
+    def _source(self, name: str, value: Any) -> Iterable['Book']:
+        """Книги, отобранные индексом одного условия"""
+        if name == 'author':
+            return self.search_by_author(value)
+        if name == 'genre':
+            return self.search_by_genre(value)
+        if name == 'year':
+            return self.search_by_year(value)
+        if name == 'year_range':
+            return (book for year in self._years_between(*value)
+                    for book in self._index_by_year[year])
+        return self.search_by_title(value)
+
+    @staticmethod
+    def _matches(book: 'Book', name: str, value: Any) -> bool:
+        """Проверка одного условия запроса для книги"""
+        if name == 'author':
+            return book.author == value
+        if name == 'genre':
+            return book.genre == value
+        if name == 'year':
+            return book.year == value
+        if name == 'year_range':
+            start, end = value
+            return (start is None or book.year >= start) and (end is None or book.year <= end)
+        return value.lower() in book.title.lower()
+
+    def plan(self, **criteria: Any) -> List[Tuple[str, Any, int]]:
+        """План запроса: условия по возрастанию оценки числа книг"""
+        steps = [(name, value, self._estimate(name, value))
+                 for name, value in criteria.items() if value is not None]
+        return sorted(steps, key=lambda step: step[2])
+
+    def query(self, limit: Optional[int] = None, offset: int = 0,
+              **criteria: Any) -> Iterator['Book']:
+        """Ленивый поиск по нескольким условиям
+
+        Поддерживаемые условия: author, genre, year, year_range=(start, end)
+        и title_contains. Книги берутся из индекса самого избирательного
+        условия и проверяются остальными условиями; порядок результатов
+        совпадает с порядком в этом индексе.
+        """
+        steps = self.plan(**criteria)
+        if not steps:
+            books = self._books()
+        else:
+            (name, value, _), filters = steps[0], steps[1:]
+            books = (book for book in self._source(name, value)
+                     if all(self._matches(book, f_name, f_value)
+                            for f_name, f_value, _ in filters))
+        stop = None if limit is None else offset + limit
+        return islice(books, offset, stop)
+
+    def explain(self, **criteria: Any) -> dict:
+        """Описание плана запроса: ведущий индекс и фильтры"""
+        steps = self.plan(**criteria)
+        if not steps:
+            return {'index': 'isbn', 'estimated': len(self), 'filters': []}
+        (name, value, estimated), filters = steps[0], steps[1:]
+        return {
+            'index': name,
+            'value': value,
+            'estimated': estimated,
+            'filters': [{'condition': f_name, 'value': f_value, 'estimated': f_estimated}
+                        for f_name, f_value, f_estimated in filters],
+        }
+
+    def dependencies(self, name: str, value: Any) -> List[tuple]:
+        """Ключи индекса, от которых зависит результат одного условия
+
+        Результат меняется, только если добавлена или удалена книга
+        с одним из этих ключей. Для подстроки берутся её триграммы
+        (любая подходящая книга содержит их все), для диапазона лет -
+        десятилетия; короткие подстроки, открытые и слишком широкие
+        (больше MAX_RANGE_DECADES десятилетий) диапазоны зависят от всех изменений.
+        """
+        if name in ('author', 'genre', 'year'):
+            return [(name, value)]
+        if name == 'year_range':
+            start, end = value
+            if start is None or end is None:
+                return [('all',)]
+            decades = range(start // 10 * 10, end + 1, 10)
+            if len(decades) > MAX_RANGE_DECADES:
+                return [('all',)]
+            return [('decade', decade) for decade in decades]
+        if name in ('title_contains', 'text'):
+            trigrams = make_trigrams(value.lower())
+            return [('trigram', trigram) for trigram in trigrams] if trigrams else [('all',)]
+        raise KeyError(f"Неизвестное условие {name}")
+
+    def generations(self, keys: Iterable[tuple]) -> tuple:
+        """Текущие поколения ключей индекса"""
+        keys = list(keys)
+        if self._trigram_rows < len(self._rows) and any(key[0] == 'trigram' for key in keys):
+            self._flush_trigrams()
+        return tuple(self._generations.get(key, 0) for key in keys)
 
     def update_index(self, old_book: 'Book', new_book: 'Book') -> None:
         """Обновление индекса при изменении книги"""
@@ -0,0 +1,209 @@
+import functools
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Гистограмма задержек: корзина k содержит вызовы длительностью < 2^k нс
+BUCKETS = 40
+
+
+class MethodStats:
+    """Статистика вызовов одного метода"""
+
+    __slots__ = ('calls', 'total_ns', 'buckets')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.buckets = [0] * BUCKETS
+
+    def record(self, elapsed_ns: int) -> None:
+        """Учёт одного вызова"""
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+
+    def to_dict(self) -> dict:
+        """Статистика в виде словаря"""
+        return {
+            'calls': self.calls,
+            'total_seconds': self.total_ns / 1e9,
+            'mean_us': self.total_ns / self.calls / 1000 if self.calls else 0.0,
+            'histogram_ns': {2 ** k: count for k, count in enumerate(self.buckets) if count},
+        }
+
+
+class Registry:
+    """Хранилище метрик: статистика методов и счётчики"""
+
+    def __init__(self):
+        self.methods: Dict[str, MethodStats] = defaultdict(MethodStats)
+        self.counters: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def count(self, name: str, label: str, value: int = 1) -> None:
+        """Увеличение счётчика name{label}"""
+        self.counters[(name, label)] += value
+
+    def reset(self) -> None:
+        """Сброс всех метрик (объекты статистики методов сохраняются)"""
+        for stats in self.methods.values():
+            stats.__init__()
+        self.counters.clear()
+
+
+registry = Registry()
+# Исходные методы, подменённые при включении: (класс, имя) -> функция
+_originals: Dict[Tuple[type, str], Callable] = {}
+
+
+def _lookup_observer(index: str) -> Callable:
+    """Учёт попаданий и промахов поиска по индексу"""
+    def observe(args, result) -> None:
+        found = result is not None and (not hasattr(result, '__len__') or len(result) > 0)
+        registry.count('index_lookups', f'{index}:{"hit" if found else "miss"}')
+    return observe
+
+
+def _remove_scan(args) -> None:
+    """Длины списков, которые просматривает IndexDict.remove_book"""
+    index, book = args[0], args[1]
+    scanned = (len(index._index_by_author.get(book.author, ()))
+               + len(index._index_by_year.get(book.year, ()))
+               + len(index._index_by_genre.get(book.genre, ())))
+    registry.count('scan_elements', 'IndexDict.remove_book', scanned)
+
+
+def _compact_scan(args) -> None:
+    """Длина списка, который проходит уплотнение BookCollection"""
+    if args[0]._holes:
+        registry.count('scan_elements', 'BookCollection._compact', len(args[0]._books))
+
+
+def _targets() -> List[Tuple[type, str, Optional[Callable], Optional[Callable]]]:
+    """Инструментируемые методы: (класс, имя, проверка до, проверка результата)"""
+    from collection_proect.book_collection import BookCollection
+    from collection_proect.index_dict import IndexDict
+    from models.library import Library
+
+    targets = [(Library, name, None, None) for name in (
+        'add_book', 'add_books', 'remove_book', 'remove_book_by_isbn', 'find_by_author',
+        'find_by_year', 'find_by_year_range', 'find_by_genre', 'find_by_isbn',
+        'find_by_title', 'search_text', 'query', 'update_book', 'apply_batch')]
+    targets += [
+        (IndexDict, 'add_book', None, None),
+        (IndexDict, 'add_books', None, None),
+        (IndexDict, 'remove_book', _remove_scan, None),
+        (IndexDict, 'remove_books', None, None),
+        (IndexDict, 'update_books', None, None),
+        (IndexDict, 'update_index', None, None),
+        (IndexDict, '_flush_trigrams', None, None),
+        (IndexDict, 'search_by_isbn', None, _lookup_observer('isbn')),
+        (IndexDict, 'search_by_author', None, _lookup_observer('author')),
+        (IndexDict, 'search_by_year', None, _lookup_observer('year')),
+        (IndexDict, 'search_by_year_range', None, _lookup_observer('year_range')),
+        (IndexDict, 'search_by_genre', None, _lookup_observer('genre')),
+        (IndexDict, 'search_by_title', None, _lookup_observer('title')),
+        (IndexDict, 'search_text', None, _lookup_observer('text')),
+        (BookCollection, 'add', None, None),
+        (BookCollection, 'extend', None, None),
+        (BookCollection, 'remove', None, None),
+        (BookCollection, 'remove_by_index', None, None),
+        (BookCollection, '__contains__', None, None),
+        (BookCollection, '_compact', _compact_scan, None),
+    ]
+    return targets
+
+
+def _wrap(name: str, func: Callable, before: Optional[Callable],
+          after: Optional[Callable]) -> Callable:
+    """Обёртка метода с замером времени"""
+    stats = registry.methods[name]
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if before is not None:
+            before(args)
+        start = clock()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            stats.record(clock() - start)
+        if after is not None:
+            after(args, result)
+        return result
+
+    return wrapper
+
+
+def is_enabled() -> bool:
+    """Включена ли инструментация"""
+    return bool(_originals)
+
+
+def enable() -> None:
+    """Включение инструментации для всех экземпляров
+
+    Методы классов подменяются обёртками; пока инструментация
+    выключена, исходные методы работают без каких-либо накладных расходов.
+    """
+    if is_enabled():
+        return
+    for cls, name, before, after in _targets():
+        func = cls.__dict__[name]
+        _originals[(cls, name)] = func
+        setattr(cls, name, _wrap(f"{cls.__name__}.{name}", func, before, after))
+
+
+def disable() -> None:
+    """Выключение инструментации и восстановление исходных методов"""
+    for (cls, name), func in _originals.items():
+        setattr(cls, name, func)
+    _originals.clear()
+
+
+def reset() -> None:
+    """Сброс накопленных метрик"""
+    registry.reset()
+
+
+def snapshot() -> dict:
+    """Текущие метрики в виде словаря"""
+    counters: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for (name, label), value in registry.counters.items():
+        counters[name][label] = value
+    return {
+        'methods': {name: stats.to_dict() for name, stats in registry.methods.items()
+                    if stats.calls},
+        'counters': dict(counters),
+    }
+
+
+def to_prometheus(prefix: str = 'library') -> str:
+    """Метрики в текстовом формате Prometheus"""
+    lines = [f'# TYPE {prefix}_method_duration_seconds histogram']
+    for name, stats in sorted(registry.methods.items()):
+        if not stats.calls:
+            continue
+        cumulative = 0
+        for k, count in enumerate(stats.buckets):
+            cumulative += count
+            if count:
+                lines.append(f'{prefix}_method_duration_seconds_bucket'
+                             f'{{method="{name}",le="{2 ** k / 1e9:.9g}"}} {cumulative}')
+        lines.append(f'{prefix}_method_duration_seconds_bucket{{method="{name}",le="+Inf"}} '
+                     f'{stats.calls}')
+        lines.append(f'{prefix}_method_duration_seconds_sum{{method="{name}"}} '
+                     f'{stats.total_ns / 1e9:.9g}')
+        lines.append(f'{prefix}_method_duration_seconds_count{{method="{name}"}} {stats.calls}')
+
+    lines.append(f'# TYPE {prefix}_index_lookups_total counter')
+    lines.append(f'# TYPE {prefix}_scan_elements_total counter')
+    for (name, label), value in sorted(registry.counters.items()):
+        if name == 'index_lookups':
+            index, result = label.split(':')
+            lines.append(f'{prefix}_index_lookups_total{{index="{index}",result="{result}"}} {value}')
+        else:
+            lines.append(f'{prefix}_{name}_total{{method="{label}"}} {value}')
+    return '\n'.join(lines) + '\n'
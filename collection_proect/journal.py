@@ -0,0 +1,253 @@
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+from models.book import Book
+
+
+OP_ADD = 1
+OP_REMOVE = 2
+OP_UPDATE = 3
+# Пачка операций в одном кадре: при восстановлении применяется целиком или никак
+OP_BATCH = 4
+# Кадр записи: длина и CRC32 полезной нагрузки
+FRAME = struct.Struct('<II')
+STRING = struct.Struct('<I')
+YEAR = struct.Struct('<i')
+
+
+def segment_path(directory: str, number: int) -> str:
+    """Путь к сегменту журнала"""
+    return os.path.join(directory, f"journal-{number:06d}.log")
+
+
+def base_path(directory: str, number: int) -> str:
+    """Путь к базовому снимку, включающему все сегменты до number"""
+    return os.path.join(directory, f"base-{number:06d}.snap")
+
+
+def list_files(directory: str, prefix: str, suffix: str) -> List[int]:
+    """Номера файлов вида <prefix>NNNNNN<suffix> по возрастанию"""
+    pattern = re.compile(rf"{prefix}(\d+){re.escape(suffix)}$")
+    if not os.path.isdir(directory):
+        return []
+    return sorted(int(match.group(1)) for match in map(pattern.match, os.listdir(directory))
+                  if match)
+
+
+def _pack_string(value: str) -> bytes:
+    """Строка с префиксом длины"""
+    data = value.encode('utf-8')
+    return STRING.pack(len(data)) + data
+
+
+def encode_add(book: 'Book') -> bytes:
+    """Полезная нагрузка записи о добавлении книги"""
+    return (bytes([OP_ADD]) + YEAR.pack(book.year) + _pack_string(book.title)
+            + _pack_string(book.author) + _pack_string(book.genre) + _pack_string(book.isbn))
+
+
+def encode_remove(isbn: str) -> bytes:
+    """Полезная нагрузка записи об удалении книги"""
+    return bytes([OP_REMOVE]) + _pack_string(isbn)
+
+
+def encode_update(old_isbn: str, book: 'Book') -> bytes:
+    """Полезная нагрузка записи об обновлении книги"""
+    return (bytes([OP_UPDATE]) + YEAR.pack(book.year) + _pack_string(old_isbn)
+            + _pack_string(book.title) + _pack_string(book.author) + _pack_string(book.genre)
+            + _pack_string(book.isbn))
+
+
+def encode_operation(operation: tuple) -> bytes:
+    """Полезная нагрузка операции ('add', книга), ('remove', isbn) или ('update', isbn, книга)"""
+    kind = operation[0]
+    if kind == 'add':
+        return encode_add(operation[1])
+    if kind == 'remove':
+        return encode_remove(operation[1])
+    if kind == 'update':
+        return encode_update(operation[1], operation[2])
+    raise ValueError(f"Неизвестная операция {kind}")
+
+
+def encode_batch(operations: Iterable[tuple]) -> bytes:
+    """Полезная нагрузка пачки операций"""
+    return bytes([OP_BATCH]) + b''.join(
+        STRING.pack(len(payload)) + payload for payload in map(encode_operation, operations))
+
+
+def decode(payload: bytes) -> Tuple[int, object]:
+    """Разбор полезной нагрузки: (операция, данные)
+
+    Данные: книга для добавления, ISBN для удаления, (старый ISBN, книга)
+    для обновления и список операций вида ('add', книга), ('remove', isbn),
+    ('update', isbn, книга) для пачки.
+    """
+    op, offset = payload[0], 1
+    if op == OP_BATCH:
+        operations = []
+        while offset < len(payload):
+            (size,) = STRING.unpack_from(payload, offset)
+            offset += STRING.size
+            sub_op, value = decode(payload[offset:offset + size])
+            offset += size
+            if sub_op == OP_ADD:
+                operations.append(('add', value))
+            elif sub_op == OP_REMOVE:
+                operations.append(('remove', value))
+            else:
+                operations.append(('update',) + value)
+        return op, operations
+    if op in (OP_ADD, OP_UPDATE):
+        (year,) = YEAR.unpack_from(payload, offset)
+        offset += YEAR.size
+    strings = []
+    while offset < len(payload):
+        (size,) = STRING.unpack_from(payload, offset)
+        offset += STRING.size
+        strings.append(payload[offset:offset + size].decode('utf-8'))
+        offset += size
+    if op == OP_ADD:
+        title, author, genre, isbn = strings
+        return op, Book(title, author, year, genre, isbn)
+    if op == OP_REMOVE:
+        return op, strings[0]
+    if op == OP_UPDATE:
+        old_isbn, title, author, genre, isbn = strings
+        return op, (old_isbn, Book(title, author, year, genre, isbn))
+    raise ValueError(f"Неизвестная операция журнала {op}")
+
+
+def read_journal(path: str) -> Iterator[Tuple[int, object, int]]:
+    """Чтение записей сегмента: (операция, данные, конец записи в байтах)
+
+    Чтение останавливается на первом неполном или повреждённом кадре -
+    это хвост, не дописанный до сбоя.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    offset = 0
+    while offset + FRAME.size <= len(data):
+        size, checksum = FRAME.unpack_from(data, offset)
+        start, end = offset + FRAME.size, offset + FRAME.size + size
+        payload = data[start:end]
+        if end > len(data) or zlib.crc32(payload) != checksum:
+            return
+        op, value = decode(payload)
+        offset = end
+        yield op, value, offset
+
+
+class Journal:
+    """Журнал изменений библиотеки с дозаписью в конец (write-ahead log)
+
+    Каждая запись сразу передаётся ОС, поэтому падение процесса её
+    не теряет. fsync (защита от сбоя питания) выполняется группой: после
+    fsync_every записей и фоновым потоком каждые fsync_interval секунд,
+    если есть несинхронизированные записи (групповая фиксация).
+    fsync_every=1 даёт синхронизацию каждой записи, commit() -
+    принудительную фиксацию.
+    Журнал делится на пронумерованные сегменты; базовый снимок base-N
+    содержит результат всех сегментов с номерами меньше N.
+    """
+
+    def __init__(self, directory: str, fsync_every: int = 100,
+                 fsync_interval: Optional[float] = 0.05):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        numbers = (list_files(directory, 'journal-', '.log')
+                   + list_files(directory, 'base-', '.snap'))
+        self.segment = max(numbers, default=0)
+        self._file = open(segment_path(directory, self.segment), 'ab')
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        if fsync_interval:
+            self._syncer = threading.Thread(target=self._sync_periodically,
+                                            name="journal-fsync", daemon=True)
+            self._syncer.start()
+
+    def __repr__(self) -> str:
+        """Строковое представление журнала"""
+        return f"Journal('{self.directory}', сегмент {self.segment})"
+
+    def _append(self, payload: bytes) -> None:
+        """Запись кадра и передача его ОС, fsync - по числу записей"""
+        with self._lock:
+            self._file.write(FRAME.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            self._pending += 1
+            if self.fsync_every and self._pending >= self.fsync_every:
+                self._fsync()
+
+    def _fsync(self) -> None:
+        """fsync накопленных записей (вызывается под блокировкой)"""
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def _sync_periodically(self) -> None:
+        """Фоновая фиксация раз в fsync_interval секунд до закрытия журнала"""
+        while not self._closed.wait(self.fsync_interval):
+            self.commit()
+
+    def record_add(self, book: 'Book') -> None:
+        """Запись о добавлении книги"""
+        self._append(encode_add(book))
+
+    def record_remove(self, isbn: str) -> None:
+        """Запись об удалении книги"""
+        self._append(encode_remove(isbn))
+
+    def record_update(self, old_isbn: str, book: 'Book') -> None:
+        """Запись об обновлении книги"""
+        self._append(encode_update(old_isbn, book))
+
+    def record_batch(self, operations: List[tuple]) -> None:
+        """Запись пачки операций одним кадром (одиночная операция - обычной записью)"""
+        if len(operations) == 1:
+            self._append(encode_operation(operations[0]))
+        elif operations:
+            self._append(encode_batch(operations))
+
+    def commit(self) -> None:
+        """Сброс буфера и fsync всех накопленных записей"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            self._fsync()
+
+    def rotate(self) -> int:
+        """Фиксация текущего сегмента и переход к следующему"""
+        with self._lock:
+            self._file.flush()
+            self._fsync()
+            self._file.close()
+            self.segment += 1
+            self._file = open(segment_path(self.directory, self.segment), 'ab')
+            return self.segment
+
+    def discard_before(self, number: int) -> None:
+        """Удаление снимков и сегментов, поглощённых снимком base-number"""
+        for old in list_files(self.directory, 'base-', '.snap'):
+            if old < number:
+                os.remove(base_path(self.directory, old))
+        for old in list_files(self.directory, 'journal-', '.log'):
+            if old < number:
+                os.remove(segment_path(self.directory, old))
+
+    def close(self) -> None:
+        """Фиксация и закрытие журнала"""
+        self._closed.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        self.commit()
+        with self._lock:
+            self._file.close()
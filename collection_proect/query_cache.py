@@ -0,0 +1,95 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+
+class QueryCache:
+    """LRU/TTL-кэш результатов поиска с точной инвалидацией
+
+    Вместе с результатом хранятся поколения ключей индекса, от которых он
+    зависит (IndexDict.dependencies). Запись считается устаревшей, только
+    если изменилось поколение одного из этих ключей, поэтому изменения
+    других авторов, жанров или лет кэш не сбрасывают.
+    """
+
+    def __init__(self, index: 'IndexDict', max_entries: int = 1024,
+                 max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.index = index
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # ключ -> (зависимости, поколения, результат, срок годности, размер)
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Количество записей в кэше"""
+        return len(self._entries)
+
+    def __repr__(self) -> str:
+        """Строковое представление кэша"""
+        return f"QueryCache({len(self)} записей, попаданий {self.hit_rate():.0%})"
+
+    def get(self, key: Hashable, dependencies: List[tuple],
+            compute: Callable[[], List[Any]]) -> List[Any]:
+        """Результат из кэша или вычисленный заново"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            _, generations, result, expires, _ = entry
+            if expires is not None and time.monotonic() >= expires:
+                self._drop(key)
+                self.evictions += 1
+            elif self.index.generations(entry[0]) != generations:
+                self._drop(key)
+                self.invalidations += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+        self.misses += 1
+        generations = self.index.generations(dependencies)
+        result = compute()
+        size = sys.getsizeof(result)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._entries[key] = (dependencies, generations, result, expires, size)
+        self._bytes += size
+        self._evict()
+        return result
+
+    def _drop(self, key: Hashable) -> None:
+        """Удаление записи"""
+        self._bytes -= self._entries.pop(key)[4]
+
+    def _evict(self) -> None:
+        """Вытеснение самых давних записей сверх ограничений"""
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            self._bytes -= self._entries.popitem(last=False)[1][4]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Очистка кэша"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def hit_rate(self) -> float:
+        """Доля попаданий"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def statistics(self) -> dict:
+        """Метрики кэша"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate(),
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+        }
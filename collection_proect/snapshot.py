@@ -0,0 +1,242 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional
+from collection_proect.book_store import BookRow, StringTable
+from models.book import Book
+
+
+# Версия 2: годы - знаковые 32-битные ('i'), как в журнале
+MAGIC = b'LIBSNAP2'
+# Порядок секций файла: (имя, тип элементов array или None для байтов)
+SECTIONS = (
+    ('name', None),
+    ('years', 'i'),
+    ('author_codes', 'I'),
+    ('genre_codes', 'H'),
+    ('title_offsets', 'Q'),
+    ('title_data', None),
+    ('isbn_offsets', 'Q'),
+    ('isbn_data', None),
+    ('author_offsets', 'Q'),
+    ('author_data', None),
+    ('genre_offsets', 'Q'),
+    ('genre_data', None),
+    ('isbn_order', 'I'),
+    ('author_ptr', 'Q'),
+    ('author_rows', 'I'),
+    ('genre_ptr', 'Q'),
+    ('genre_rows', 'I'),
+    ('year_keys', 'i'),
+    ('year_ptr', 'Q'),
+    ('year_rows', 'I'),
+)
+# Заголовок: сигнатура, порядок байт (1 - little endian), затем смещение
+# и длина каждой секции
+HEADER = struct.Struct('<8sB7x' + 'QQ' * len(SECTIONS))
+
+
+def _string_table(values: Iterable[str]) -> tuple:
+    """Упаковка строк в буфер UTF-8 и массив смещений"""
+    data = bytearray()
+    offsets = array('Q', [0])
+    for value in values:
+        data += value.encode('utf-8')
+        offsets.append(len(data))
+    return offsets, data
+
+
+def _postings(codes: Iterable[int], size: int) -> tuple:
+    """Списки строк по кодам в формате CSR: указатели и номера строк"""
+    groups: List[List[int]] = [[] for _ in range(size)]
+    for row, code in enumerate(codes):
+        groups[code].append(row)
+    ptr = array('Q', [0])
+    rows = array('I')
+    for group in groups:
+        rows.extend(group)
+        ptr.append(len(rows))
+    return ptr, rows
+
+
+def write_snapshot(path: str, name: str, books: Iterable['Book']) -> None:
+    """Запись снимка библиотеки в бинарный файл
+
+    Книги сохраняются колонками в порядке коллекции, словари авторов
+    и жанров отсортированы, что позволяет искать в них бинарным поиском
+    без декодирования всего файла. Файл записывается на диск (fsync)
+    и заменяется атомарно.
+    """
+    books = list(books)
+    authors = sorted({book.author for book in books})
+    genres = sorted({book.genre for book in books})
+    author_ids: Dict[str, int] = {author: i for i, author in enumerate(authors)}
+    genre_ids: Dict[str, int] = {genre: i for i, genre in enumerate(genres)}
+    year_keys = array('i', sorted({book.year for book in books}))
+    year_ids = {year: i for i, year in enumerate(year_keys)}
+
+    sections = {'name': name.encode('utf-8'),
+                'years': array('i', (book.year for book in books)),
+                'author_codes': array('I', (author_ids[book.author] for book in books)),
+                'genre_codes': array('H', (genre_ids[book.genre] for book in books)),
+                'isbn_order': array('I', sorted(range(len(books)), key=lambda row: books[row].isbn)),
+                'year_keys': year_keys}
+    sections['title_offsets'], sections['title_data'] = _string_table(book.title for book in books)
+    sections['isbn_offsets'], sections['isbn_data'] = _string_table(book.isbn for book in books)
+    sections['author_offsets'], sections['author_data'] = _string_table(authors)
+    sections['genre_offsets'], sections['genre_data'] = _string_table(genres)
+    sections['author_ptr'], sections['author_rows'] = _postings(sections['author_codes'], len(authors))
+    sections['genre_ptr'], sections['genre_rows'] = _postings(sections['genre_codes'], len(genres))
+    sections['year_ptr'], sections['year_rows'] = _postings(
+        (year_ids[book.year] for book in books), len(year_keys))
+
+    layout = []
+    offset = HEADER.size
+    for section, _ in SECTIONS:
+        data = sections[section]
+        size = len(data) * data.itemsize if isinstance(data, array) else len(data)
+        # Выравнивание секций по 8 байт
+        offset += -offset % 8
+        layout.append((offset, size))
+        offset += size
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, sys.byteorder == 'little',
+                                   *(value for pair in layout for value in pair)))
+            for (section, _), (offset, _) in zip(SECTIONS, layout):
+                file.write(b'\0' * (offset - file.tell()))
+                data = sections[section]
+                file.write(data.tobytes() if isinstance(data, array) else data)
+            # Данные должны быть на диске до переименования, иначе после сбоя
+            # питания на месте снимка может оказаться пустой файл
+            file.flush()
+            os.fsync(file.fileno())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def _fsync_directory(directory: str) -> None:
+    """fsync каталога, чтобы переименование в нём пережило сбой питания"""
+    if os.name != 'posix':
+        # Windows не позволяет открыть каталог как файл
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class SnapshotReader:
+    """Снимок библиотеки, отображённый в память через mmap
+
+    Колонки и списки индексов читаются из файла без копирования,
+    строки декодируются только при обращении к конкретной книге.
+    Атрибуты колонок названы так же, как в BookStore, поэтому
+    книги выдаются представлениями BookRow.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self._mmap)
+        if header[0] != MAGIC:
+            raise ValueError(f"Файл {path} не является снимком библиотеки")
+        if bool(header[1]) != (sys.byteorder == 'little'):
+            raise ValueError("Снимок записан с другим порядком байт")
+        buffer = memoryview(self._mmap)
+        sections = {}
+        for i, (section, typecode) in enumerate(SECTIONS):
+            offset, size = header[2 + 2 * i], header[3 + 2 * i]
+            view = buffer[offset:offset + size]
+            sections[section] = view.cast(typecode) if typecode else view
+        self.name = str(sections['name'], 'utf-8')
+        self._years = sections['years']
+        self._author_codes = sections['author_codes']
+        self._genre_codes = sections['genre_codes']
+        self._titles = StringTable.from_buffers(sections['title_data'], sections['title_offsets'])
+        self._isbns = StringTable.from_buffers(sections['isbn_data'], sections['isbn_offsets'])
+        self._authors = StringTable.from_buffers(sections['author_data'], sections['author_offsets'])
+        self._genres = StringTable.from_buffers(sections['genre_data'], sections['genre_offsets'])
+        self._sections = sections
+
+    def __len__(self) -> int:
+        """Количество книг в снимке"""
+        return len(self._years)
+
+    def __iter__(self) -> Iterator[BookRow]:
+        """Итерация по представлениям книг в порядке коллекции"""
+        for row in range(len(self)):
+            yield BookRow(self, row)
+
+    def __repr__(self) -> str:
+        """Строковое представление снимка"""
+        return f"SnapshotReader('{self.name}', {len(self)} книг)"
+
+    def to_book(self, row: int) -> Book:
+        """Декодирование строки в самостоятельный объект Book"""
+        return Book(self._titles[row], self._authors[self._author_codes[row]],
+                    self._years[row], self._genres[self._genre_codes[row]], self._isbns[row])
+
+    def books(self) -> Iterator[Book]:
+        """Все книги снимка как объекты Book (для полной загрузки)"""
+        for row in range(len(self)):
+            yield self.to_book(row)
+
+    @staticmethod
+    def _find(table, value) -> Optional[int]:
+        """Бинарный поиск значения в отсортированной таблице"""
+        position = bisect_left(table, value)
+        if position < len(table) and table[position] == value:
+            return position
+        return None
+
+    def _rows(self, section: str, code: Optional[int]) -> List[BookRow]:
+        """Представления книг из CSR-списка индекса"""
+        if code is None:
+            return []
+        ptr = self._sections[f'{section}_ptr']
+        rows = self._sections[f'{section}_rows'][ptr[code]:ptr[code + 1]]
+        return [BookRow(self, row) for row in rows]
+
+    def search_by_isbn(self, isbn: str) -> Optional[BookRow]:
+        """Поиск книги по ISBN (бинарный поиск по отсортированным ISBN)"""
+        order = self._sections['isbn_order']
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._isbns[order[mid]] < isbn:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self._isbns[order[lo]] == isbn:
+            return BookRow(self, order[lo])
+        return None
+
+    def search_by_author(self, author: str) -> List[BookRow]:
+        """Поиск книг по автору"""
+        return self._rows('author', self._find(self._authors, author))
+
+    def search_by_genre(self, genre: str) -> List[BookRow]:
+        """Поиск книг по жанру"""
+        return self._rows('genre', self._find(self._genres, genre))
+
+    def search_by_year(self, year: int) -> List[BookRow]:
+        """Поиск книг по году"""
+        return self._rows('year', self._find(self._sections['year_keys'], year))
+
+    def close(self) -> None:
+        """Закрытие отображения файла"""
+        self._sections = {}
+        self._years = self._author_codes = self._genre_codes = None
+        self._titles = self._isbns = self._authors = self._genres = None
+        self._mmap.close()
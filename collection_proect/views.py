@@ -0,0 +1,117 @@
+from itertools import islice
+from typing import Any, Callable, Iterator, Sequence, Union
+
+
+class BookView:
+    """Ленивое представление последовательности книг без копирования
+
+    Представления только читают источник: изменить через них коллекцию
+    или список индекса нельзя. Поддерживаются цепочки срезов, фильтров
+    и отображений.
+    """
+
+    def __iter__(self) -> Iterator[Any]:
+        """Итерация по элементам представления"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        """Количество элементов"""
+        return sum(1 for _ in self)
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        """Доступ по индексу или срезу (срез - тоже представление)"""
+        if isinstance(key, slice):
+            return SliceView(self, key)
+        if key < 0:
+            key += len(self)
+        if key < 0:
+            raise IndexError("Индекс вне диапазона")
+        for item in islice(self, key, None):
+            return item
+        raise IndexError("Индекс вне диапазона")
+
+    def __contains__(self, item: Any) -> bool:
+        """Проверка наличия элемента"""
+        return any(element == item for element in self)
+
+    def __repr__(self) -> str:
+        """Строковое представление"""
+        return f"{type(self).__name__}({len(self)} книг)"
+
+    def filter(self, predicate: Callable[[Any], bool]) -> 'FilterView':
+        """Представление элементов, удовлетворяющих условию"""
+        return FilterView(self, predicate)
+
+    def map(self, func: Callable[[Any], Any]) -> 'MapView':
+        """Представление результатов func для каждого элемента"""
+        return MapView(self, func)
+
+    def to_list(self) -> list:
+        """Материализация представления"""
+        return list(self)
+
+
+class SliceView(BookView):
+    """Срез последовательности без копирования элементов
+
+    Границы вычисляются при каждом обращении, поэтому представление
+    отражает текущее состояние источника.
+    """
+
+    def __init__(self, source: Sequence, key: slice):
+        self._source = source
+        self._slice = key
+
+    def _range(self) -> range:
+        """Индексы источника, входящие в срез"""
+        return range(*self._slice.indices(len(self._source)))
+
+    def __iter__(self) -> Iterator[Any]:
+        """Итерация по элементам среза"""
+        source = self._source
+        for index in self._range():
+            yield source[index]
+
+    def __len__(self) -> int:
+        """Количество элементов среза"""
+        return len(self._range())
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        """Доступ по индексу или вложенному срезу"""
+        if isinstance(key, slice):
+            return SliceView(self, key)
+        return self._source[self._range()[key]]
+
+
+class FilterView(BookView):
+    """Отфильтрованная последовательность (длина считается проходом)"""
+
+    def __init__(self, source: Sequence, predicate: Callable[[Any], bool]):
+        self._source = source
+        self._predicate = predicate
+
+    def __iter__(self) -> Iterator[Any]:
+        """Итерация по подходящим элементам"""
+        return filter(self._predicate, self._source)
+
+
+class MapView(BookView):
+    """Последовательность результатов функции над элементами источника"""
+
+    def __init__(self, source: Sequence, func: Callable[[Any], Any]):
+        self._source = source
+        self._func = func
+
+    def __iter__(self) -> Iterator[Any]:
+        """Итерация по преобразованным элементам"""
+        return map(self._func, self._source)
+
+    def __len__(self) -> int:
+        """Количество элементов (как у источника)"""
+        return len(self._source)
+
+    def __getitem__(self, key: Union[int, slice]) -> Any:
+        """Доступ по индексу или срезу"""
+        if isinstance(key, slice):
+            return SliceView(self, key)
+        return self._func(self._source[key])
@@ -1,11 +1,18 @@
+import sys
+
+
 class Book:
     """Класс книги с основными атрибутами"""
 
+    # Без __dict__ у каждого экземпляра: книг в каталоге миллионы
+    __slots__ = ('title', 'author', 'year', 'genre', 'isbn')
+
     def __init__(self, title: str, author: str, year: int, genre: str, isbn: str):
         self.title = title
-        self.author = author
+        # Авторы и жанры повторяются тысячи раз, храним одну копию строки
+        self.author = sys.intern(author)
         self.year = year
-        self.genre = genre
+        self.genre = sys.intern(genre)
         self.isbn = isbn
 
     def __repr__(self) -> str:
@@ -18,10 +25,21 @@ class Book:
             return self.isbn == other.isbn
         return False
 
+    def __hash__(self) -> int:
+        """Хеш книги согласован с __eq__ (по ISBN)"""
+        return hash(self.isbn)
+
+    def __reduce__(self) -> tuple:
+        """Сериализация через конструктор (строки снова интернируются)"""
+        return Book, (self.title, self.author, self.year, self.genre, self.isbn)
+
     def __contains__(self, item: str) -> bool:
         """Магический метод для проверки наличия подстроки в информации о книге"""
-        search_text = f"{self.title} {self.author} {self.genre} {self.year} {self.isbn}"
-        return item.lower() in search_text.lower()
+        return item.lower() in self.get_search_text()
+
+    def get_search_text(self) -> str:
+        """Текст всех полей книги в нижнем регистре для полнотекстового поиска"""
+        return f"{self.title} {self.author} {self.genre} {self.year} {self.isbn}".lower()
 
     def get_info(self) -> dict:
         """Возвращает информацию о книге в виде словаря"""
@@ -0,0 +1,313 @@
+import threading
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+from collection_proect.book_collection import BookCollection
+from models.library import Library
+
+
+_MISSING = object()
+
+
+class ShardedMap:
+    """Неизменяемый словарь, разбитый на части
+
+    updated() возвращает новый словарь, копируя только те части,
+    в которых есть изменения; остальные части разделяются между версиями.
+    """
+
+    __slots__ = ('_shards',)
+
+    SHARDS = 256
+
+    def __init__(self, shards: Optional[Tuple[dict, ...]] = None):
+        self._shards = shards if shards is not None else tuple({} for _ in range(self.SHARDS))
+
+    def __len__(self) -> int:
+        """Количество ключей"""
+        return sum(len(shard) for shard in self._shards)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Значение по ключу"""
+        return self._shards[hash(key) % self.SHARDS].get(key, default)
+
+    def updated(self, changes: Dict[Hashable, Any]) -> 'ShardedMap':
+        """Новая версия словаря с изменениями (_MISSING - удаление ключа)"""
+        shards = list(self._shards)
+        copied: Set[int] = set()
+        for key, value in changes.items():
+            number = hash(key) % self.SHARDS
+            if number not in copied:
+                shards[number] = dict(shards[number])
+                copied.add(number)
+            if value is _MISSING:
+                shards[number].pop(key, None)
+            else:
+                shards[number][key] = value
+        return ShardedMap(tuple(shards))
+
+
+class LibraryVersion:
+    """Неизменяемый опубликованный срез индексов библиотеки"""
+
+    __slots__ = ('number', 'total_books', 'by_isbn', 'by_author', 'by_genre', 'by_year',
+                 'sorted_years')
+
+    def __init__(self, number: int, total_books: int, by_isbn: ShardedMap,
+                 by_author: ShardedMap, by_genre: ShardedMap, by_year: ShardedMap,
+                 sorted_years: Tuple[int, ...]):
+        self.number = number
+        self.total_books = total_books
+        self.by_isbn = by_isbn
+        self.by_author = by_author
+        self.by_genre = by_genre
+        self.by_year = by_year
+        self.sorted_years = sorted_years
+
+    def __repr__(self) -> str:
+        """Строковое представление версии"""
+        return f"LibraryVersion({self.number}, книг: {self.total_books})"
+
+
+class ConcurrentLibrary:
+    """Потокобезопасная обёртка над Library
+
+    Писатели по очереди изменяют внутреннюю библиотеку и публикуют новую
+    неизменяемую версию индексов (LibraryVersion). Поиск по ISBN, автору,
+    жанру, году и диапазону лет читает текущую версию без блокировок:
+    ссылка на версию заменяется атомарно, а опубликованные кортежи книг
+    никогда не изменяются. Публикация копирует только затронутые части
+    словарей и списки изменённых ключей; в batch() публикация одна на пачку.
+    Поиск по тексту, составные запросы и статистика выполняются под той же
+    блокировкой, что и запись: они обращаются к внутренним структурам,
+    которые меняются и при чтении (отложенные триграммы, кэш запросов).
+    """
+
+    def __init__(self, library: Optional[Library] = None, name: str = "Библиотека"):
+        self._library = library if library is not None else Library(name)
+        self._lock = threading.RLock()
+        self._batch_owner: Optional[int] = None
+        self._dirty: Dict[str, Set[Hashable]] = {'isbn': set(), 'author': set(),
+                                                  'genre': set(), 'year': set()}
+        self._version = LibraryVersion(0, 0, ShardedMap(), ShardedMap(), ShardedMap(),
+                                       ShardedMap(), ())
+        with self._lock:
+            for book in self._library.book_collection:
+                self._touch(book)
+            self._publish()
+
+    @property
+    def name(self) -> str:
+        """Название библиотеки"""
+        return self._library.name
+
+    @property
+    def version(self) -> LibraryVersion:
+        """Текущая опубликованная версия"""
+        return self._version
+
+    def __repr__(self) -> str:
+        """Строковое представление библиотеки"""
+        return f"ConcurrentLibrary('{self.name}', книг: {self._version.total_books})"
+
+    def __len__(self) -> int:
+        """Количество книг в опубликованной версии"""
+        return self._version.total_books
+
+    # Запись
+
+    def _touch(self, book: 'Book') -> None:
+        """Отметка ключей книги как изменённых"""
+        self._dirty['isbn'].add(book.isbn)
+        self._dirty['author'].add(book.author)
+        self._dirty['genre'].add(book.genre)
+        self._dirty['year'].add(book.year)
+
+    def _publish(self) -> None:
+        """Публикация новой версии с изменёнными ключами"""
+        index = self._library.index_dict
+        current = self._version
+
+        def changes(kind: str, search) -> Dict[Hashable, Any]:
+            result = {}
+            for key in self._dirty[kind]:
+                books = search(key)
+                result[key] = tuple(books) if books else _MISSING
+            self._dirty[kind] = set()
+            return result
+
+        isbn_changes = {isbn: index.search_by_isbn(isbn) or _MISSING
+                        for isbn in self._dirty['isbn']}
+        self._dirty['isbn'] = set()
+        years_changed = bool(self._dirty['year'])
+        self._version = LibraryVersion(
+            current.number + 1,
+            len(self._library.book_collection),
+            current.by_isbn.updated(isbn_changes),
+            current.by_author.updated(changes('author', index.search_by_author)),
+            current.by_genre.updated(changes('genre', index.search_by_genre)),
+            current.by_year.updated(changes('year', index.search_by_year)),
+            tuple(index.years()) if years_changed else current.sorted_years,
+        )
+
+    def _write(self, action):
+        """Выполнение изменения под блокировкой записи с публикацией"""
+        if self._batch_owner == threading.get_ident():
+            return action()
+        with self._lock:
+            result = action()
+            self._publish()
+        return result
+
+    @contextmanager
+    def batch(self) -> Iterator['ConcurrentLibrary']:
+        """Пачка изменений с одной публикацией в конце
+
+        Блокировка записи удерживается до конца пачки; читатели
+        версий при этом не блокируются и видят предыдущую версию.
+        """
+        if self._batch_owner == threading.get_ident():
+            yield self
+            return
+        with self._lock:
+            self._batch_owner = threading.get_ident()
+            try:
+                yield self
+            finally:
+                self._batch_owner = None
+                self._publish()
+
+    def add_book(self, book: 'Book') -> bool:
+        """Добавление книги"""
+        def action() -> bool:
+            self._touch(book)
+            return self._library.add_book(book)
+        return self._write(action)
+
+    def add_books(self, books: Iterable['Book']) -> int:
+        """Пакетное добавление книг"""
+        books = list(books)
+
+        def action() -> int:
+            for book in books:
+                self._touch(book)
+            return self._library.add_books(books)
+        return self._write(action)
+
+    def remove_book(self, book: 'Book') -> bool:
+        """Удаление книги"""
+        def action() -> bool:
+            self._touch(book)
+            return self._library.remove_book(book)
+        return self._write(action)
+
+    def remove_book_by_isbn(self, isbn: str) -> bool:
+        """Удаление книги по ISBN"""
+        def action() -> bool:
+            book = self._library.find_by_isbn(isbn)
+            if book is None:
+                return False
+            self._touch(book)
+            return self._library.remove_book(book)
+        return self._write(action)
+
+    def update_book(self, old_isbn: str, new_book: 'Book') -> bool:
+        """Обновление информации о книге
+
+        Library.update_book не изменяет объекты книг, поэтому опубликованные
+        версии, ссылающиеся на старую книгу, остаются прежними до публикации.
+        """
+        def action() -> bool:
+            old_book = self._library.find_by_isbn(old_isbn)
+            if old_book is None:
+                return False
+            self._touch(old_book)
+            self._touch(new_book)
+            return self._library.update_book(old_isbn, new_book)
+        return self._write(action)
+
+    def apply_batch(self, operations: Iterable[tuple]) -> List[bool]:
+        """Пачка операций (см. Library.apply_batch) с одной публикацией
+
+        Читатели видят либо состояние до пачки, либо после неё.
+        """
+        operations = list(operations)
+        for operation in operations:
+            if operation[0] not in ('add', 'remove', 'update'):
+                raise ValueError(f"Неизвестная операция {operation[0]}")
+        apply = {'add': self.add_book, 'remove': self.remove_book_by_isbn,
+                 'update': self.update_book}
+        with self.batch():
+            return [apply[operation[0]](*operation[1:]) for operation in operations]
+
+    # Чтение без блокировок
+
+    def find_by_isbn(self, isbn: str) -> Optional['Book']:
+        """Поиск книги по ISBN"""
+        return self._version.by_isbn.get(isbn)
+
+    def find_by_author(self, author: str) -> BookCollection:
+        """Поиск книг по автору"""
+        return BookCollection(self._version.by_author.get(author, ()))
+
+    def find_by_genre(self, genre: str) -> BookCollection:
+        """Поиск книг по жанру"""
+        return BookCollection(self._version.by_genre.get(genre, ()))
+
+    def find_by_year(self, year: int) -> BookCollection:
+        """Поиск книг по году"""
+        return BookCollection(self._version.by_year.get(year, ()))
+
+    def find_by_year_range(self, start: int, end: int) -> BookCollection:
+        """Поиск книг, изданных с start по end включительно"""
+        version = self._version
+        years = version.sorted_years[bisect_left(version.sorted_years, start):
+                                     bisect_right(version.sorted_years, end)]
+        return BookCollection([book for year in years for book in version.by_year.get(year, ())])
+
+    # Чтение под общей блокировкой
+
+    def find_by_title(self, title_part: str) -> BookCollection:
+        """Поиск книг по части названия"""
+        with self._lock:
+            return BookCollection(list(self._library.find_by_title(title_part)))
+
+    def search_text(self, query: str) -> BookCollection:
+        """Поиск книг по подстроке в любом поле"""
+        with self._lock:
+            return BookCollection(list(self._library.search_text(query)))
+
+    def complete_author(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Автодополнение автора (см. Library.complete_author)"""
+        with self._lock:
+            return self._library.complete_author(prefix, k)
+
+    def complete_title(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Автодополнение названия (см. Library.complete_title)"""
+        with self._lock:
+            return self._library.complete_title(prefix, k)
+
+    def fuzzy_author(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Нечёткий поиск автора (см. Library.fuzzy_author)"""
+        with self._lock:
+            return self._library.fuzzy_author(text, max_distance, k)
+
+    def fuzzy_title(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Нечёткий поиск названия (см. Library.fuzzy_title)"""
+        with self._lock:
+            return self._library.fuzzy_title(text, max_distance, k)
+
+    def query(self, **criteria: Any) -> List['Book']:
+        """Поиск по нескольким условиям (см. Library.query)"""
+        with self._lock:
+            return list(self._library.query(**criteria))
+
+    def get_all_books(self) -> BookCollection:
+        """Копия всех книг"""
+        with self._lock:
+            return BookCollection(self._library.book_collection.get_books())
+
+    def get_statistics(self, detail=None, top: int = 10) -> dict:
+        """Получение статистики библиотеки"""
+        with self._lock:
+            return self._library.get_statistics(detail, top)
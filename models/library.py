@@ -1,31 +1,235 @@
+import os
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from collection_proect.book_collection import BookCollection
+from collection_proect import instrumentation
 from collection_proect.index_dict import IndexDict
+from collection_proect.query_cache import QueryCache
+from collection_proect.journal import (Journal, OP_ADD, OP_BATCH, OP_REMOVE, base_path,
+                                       list_files, read_journal, segment_path)
+from collection_proect.snapshot import SnapshotReader, write_snapshot
+from models.readers import read_books
+
+
+class Transaction:
+    """Накопитель операций для Library.transaction()
+
+    Операции применяются одной пачкой при выходе из блока with;
+    до этого библиотека их не видит. results - итоги операций.
+    """
+
+    def __init__(self):
+        self.operations: List[tuple] = []
+        self.results: Optional[List[bool]] = None
+
+    def add_book(self, book: 'Book') -> None:
+        """Добавление книги"""
+        self.operations.append(('add', book))
+
+    def add_books(self, books: Iterable['Book']) -> None:
+        """Добавление нескольких книг"""
+        self.operations.extend(('add', book) for book in books)
+
+    def remove_book(self, book: 'Book') -> None:
+        """Удаление книги"""
+        self.operations.append(('remove', book.isbn))
+
+    def remove_book_by_isbn(self, isbn: str) -> None:
+        """Удаление книги по ISBN"""
+        self.operations.append(('remove', isbn))
+
+    def update_book(self, old_isbn: str, new_book: 'Book') -> None:
+        """Обновление информации о книге"""
+        self.operations.append(('update', old_isbn, new_book))
 
 
 class Library:
-    """Класс библиотеки, управляющий коллекциями книг и индексами"""
+    """Класс библиотеки, управляющий коллекциями книг и индексами
+
+    Библиотека, загруженная из снимка (load_snapshot), отвечает на поиск
+    по ISBN, автору, жанру и году прямо из отображённого в память файла.
+    Коллекция и индексы строятся только при первом обращении к ним.
+
+    При подключённом журнале (open_journal) каждое изменение записывается
+    в него до возврата из метода; recover восстанавливает библиотеку из
+    последнего базового снимка и журнала.
+    """
 
     def __init__(self, name: str):
         self.name = name
-        self.book_collection = BookCollection()
-        self.index_dict = IndexDict()
+        self._book_collection = BookCollection()
+        self._index_dict = IndexDict()
+        self._snapshot: Optional[SnapshotReader] = None
+        self._journal: Optional[Journal] = None
+        self.query_cache: Optional[QueryCache] = None
+        # Ошибка последней фоновой свёртки журнала (None - ошибок не было)
+        self.compaction_error: Optional[BaseException] = None
 
     def __repr__(self) -> str:
         """Строковое представление библиотеки"""
+        if self._snapshot is not None:
+            return f"Library('{self.name}', книг: {len(self._snapshot)})"
         return f"Library('{self.name}', книг: {len(self.book_collection)})"
 
+    @property
+    def book_collection(self) -> BookCollection:
+        """Коллекция книг (при загрузке из снимка строится при обращении)"""
+        self._materialize()
+        return self._book_collection
+
+    @property
+    def index_dict(self) -> IndexDict:
+        """Индексы книг (при загрузке из снимка строятся при обращении)"""
+        self._materialize()
+        return self._index_dict
+
+    def _materialize(self) -> None:
+        """Полная загрузка книг из снимка в коллекцию и индексы
+
+        Книги снимка уже сохранены, поэтому в журнал они не пишутся.
+        """
+        if self._snapshot is not None:
+            snapshot, self._snapshot = self._snapshot, None
+            journal, self._journal = self._journal, None
+            try:
+                self.add_books(snapshot.books())
+            finally:
+                self._journal = journal
+
+    def save_snapshot(self, path: str) -> None:
+        """Сохранение библиотеки в бинарный снимок"""
+        write_snapshot(path, self.name, self.book_collection)
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> 'Library':
+        """Открытие снимка без декодирования книг"""
+        snapshot = SnapshotReader(path)
+        library = cls(snapshot.name)
+        library._snapshot = snapshot
+        return library
+
+    def open_journal(self, directory: str, fsync_every: int = 100,
+                     fsync_interval: Optional[float] = 0.05) -> Journal:
+        """Подключение журнала изменений"""
+        self._journal = Journal(directory, fsync_every, fsync_interval)
+        return self._journal
+
+    def close_journal(self) -> None:
+        """Фиксация и отключение журнала"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def compact_journal(self, background: bool = True) -> Optional[threading.Thread]:
+        """Свёртка журнала в новый базовый снимок
+
+        Книги копируются в вызывающем потоке, новые изменения сразу идут
+        в следующий сегмент; запись снимка и удаление поглощённых сегментов
+        выполняются в фоновом потоке (если background=True).
+        Снимок записывается на диск (fsync) до удаления сегментов. Ошибка
+        фоновой свёртки сохраняется в compaction_error, сегменты журнала
+        при этом остаются на месте.
+        """
+        journal = self._journal
+        if journal is None:
+            raise RuntimeError("Журнал не подключён: сначала вызовите open_journal")
+        books = self.book_collection.get_books()
+        number = journal.rotate()
+
+        def compact() -> None:
+            write_snapshot(base_path(journal.directory, number), self.name, books)
+            journal.discard_before(number)
+
+        if not background:
+            compact()
+            return None
+
+        def compact_in_background() -> None:
+            try:
+                compact()
+            except Exception as error:
+                self.compaction_error = error
+
+        self.compaction_error = None
+        thread = threading.Thread(target=compact_in_background, name="journal-compaction")
+        thread.start()
+        return thread
+
+    @classmethod
+    def recover(cls, directory: str, name: str = "Библиотека", **journal_options) -> 'Library':
+        """Восстановление библиотеки из базового снимка и журнала
+
+        Последовательные добавления применяются пакетами через add_books.
+        Недописанный хвост последнего сегмента отрезается, после чего
+        журнал подключается для дальнейшей записи.
+        """
+        bases = list_files(directory, 'base-', '.snap')
+        first = bases[-1] if bases else 0
+        library = cls.load_snapshot(base_path(directory, first)) if bases else cls(name)
+        for number in list_files(directory, 'journal-', '.log'):
+            if number < first:
+                continue
+            path = segment_path(directory, number)
+            added, valid_size = [], 0
+            for op, value, valid_size in read_journal(path):
+                if op == OP_ADD:
+                    added.append(value)
+                    continue
+                library.add_books(added)
+                added = []
+                if op == OP_REMOVE:
+                    library.remove_book_by_isbn(value)
+                elif op == OP_BATCH:
+                    library.apply_batch(value)
+                else:
+                    library.update_book(*value)
+            library.add_books(added)
+            if os.path.getsize(path) != valid_size:
+                os.truncate(path, valid_size)
+        library.open_journal(directory, **journal_options)
+        return library
+
     def add_book(self, book: 'Book') -> bool:
         """Добавление книги в библиотеку"""
         if book not in self.book_collection:
             self.book_collection.add(book)
             self.index_dict.add_book(book)
+            if self._journal is not None:
+                self._journal.record_add(book)
             return True
         return False
 
+    def add_books(self, books: Iterable['Book'], chunk_size: int = 10_000) -> int:
+        """Пакетное добавление книг, возвращает число добавленных
+
+        Источник читается порциями по chunk_size, поэтому поток книг
+        никогда не материализуется целиком. Дубликаты по ISBN пропускаются.
+        """
+        added = 0
+        books = iter(books)
+        while True:
+            chunk = list(islice(books, chunk_size))
+            if not chunk:
+                return added
+            fresh = self.book_collection.extend(chunk)
+            self.index_dict.add_books(fresh)
+            if self._journal is not None:
+                for book in fresh:
+                    self._journal.record_add(book)
+            added += len(fresh)
+
+    def bulk_load(self, path: str, chunk_size: int = 10_000) -> int:
+        """Загрузка книг из файла CSV или JSON Lines"""
+        return self.add_books(read_books(path), chunk_size)
+
     def remove_book(self, book: 'Book') -> bool:
         """Удаление книги из библиотеки"""
         if self.book_collection.remove(book):
             self.index_dict.remove_book(book)
+            if self._journal is not None:
+                self._journal.record_remove(book.isbn)
             return True
         return False
 
@@ -38,49 +242,245 @@ class Library:
 
     def find_by_author(self, author: str) -> BookCollection:
         """Поиск книг по автору"""
-        books = self.index_dict.search_by_author(author)
-        return BookCollection(books)
+        if self._snapshot is not None:
+            return BookCollection(self._snapshot.search_by_author(author))
+        # Список индекса меняется вместе с библиотекой: результат - его копия
+        return BookCollection(list(self.index_dict.search_by_author(author)))
 
     def find_by_year(self, year: int) -> BookCollection:
         """Поиск книг по году"""
-        books = self.index_dict.search_by_year(year)
+        if self._snapshot is not None:
+            return BookCollection(self._snapshot.search_by_year(year))
+        # Список индекса меняется вместе с библиотекой: результат - его копия
+        return BookCollection(list(self.index_dict.search_by_year(year)))
+
+    def enable_cache(self, max_entries: int = 1024, max_bytes: Optional[int] = None,
+                     ttl: Optional[float] = None) -> QueryCache:
+        """Включение кэша результатов поиска
+
+        Кэшируются find_by_title, search_text, find_by_year_range и query;
+        точный поиск по автору, жанру, году и ISBN и так стоит O(1).
+        """
+        self.query_cache = QueryCache(self.index_dict, max_entries, max_bytes, ttl)
+        return self.query_cache
+
+    def disable_cache(self) -> None:
+        """Выключение кэша результатов поиска"""
+        self.query_cache = None
+
+    def _cached(self, key: tuple, dependencies, compute) -> List['Book']:
+        """Результат через кэш (если он включён)
+
+        dependencies - функция, возвращающая ключи зависимостей; без кэша
+        она не вызывается.
+        """
+        if self.query_cache is None:
+            return compute()
+        return self.query_cache.get(key, dependencies(), compute)
+
+    def find_by_year_range(self, start: int, end: int) -> BookCollection:
+        """Поиск книг, изданных с start по end включительно"""
+        books = self._cached(('year_range', start, end),
+                             lambda: self.index_dict.dependencies('year_range', (start, end)),
+                             lambda: self.index_dict.search_by_year_range(start, end))
         return BookCollection(books)
 
     def find_by_genre(self, genre: str) -> BookCollection:
         """Поиск книг по жанру"""
-        books = self.index_dict.search_by_genre(genre)
-        return BookCollection(books)
+        if self._snapshot is not None:
+            return BookCollection(self._snapshot.search_by_genre(genre))
+        # Список индекса меняется вместе с библиотекой: результат - его копия
+        return BookCollection(list(self.index_dict.search_by_genre(genre)))
 
     def find_by_isbn(self, isbn: str) -> 'Book':
         """Поиск книги по ISBN"""
+        if self._snapshot is not None:
+            return self._snapshot.search_by_isbn(isbn)
         return self.index_dict.search_by_isbn(isbn)
 
     def find_by_title(self, title_part: str) -> BookCollection:
         """Поиск книг по части названия"""
-        result = []
-        for book in self.book_collection:
-            if title_part.lower() in book.title.lower():
-                result.append(book)
-        return BookCollection(result)
+        books = self._cached(('title', title_part.lower()),
+                             lambda: self.index_dict.dependencies('title_contains', title_part),
+                             lambda: self.index_dict.search_by_title(title_part))
+        return BookCollection(books)
+
+    def search_text(self, query: str) -> BookCollection:
+        """Поиск книг по подстроке в любом поле"""
+        books = self._cached(('text', query.lower()),
+                             lambda: self.index_dict.dependencies('text', query),
+                             lambda: self.index_dict.search_text(query))
+        return BookCollection(books)
+
+    def complete_author(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Автодополнение автора: k самых крупных авторов с именем или фамилией на prefix"""
+        return self.index_dict.complete_author(prefix, k)
+
+    def complete_title(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Автодополнение названия: k названий на prefix с наибольшим числом книг"""
+        return self.index_dict.complete_title(prefix, k)
+
+    def fuzzy_author(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Авторы, похожие на text с опечатками (не больше max_distance правок)"""
+        return self.index_dict.fuzzy_author(text, max_distance, k)
+
+    def fuzzy_title(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Названия, похожие на text с опечатками (не больше max_distance правок)"""
+        return self.index_dict.fuzzy_title(text, max_distance, k)
+
+    def query(self, author: Optional[str] = None, genre: Optional[str] = None,
+              year: Optional[int] = None, year_range: Optional[Tuple[int, int]] = None,
+              title_contains: Optional[str] = None, limit: Optional[int] = None,
+              offset: int = 0) -> Iterator['Book']:
+        """Поиск книг по нескольким условиям сразу (результат ленивый)
+
+        При включённом кэше полный результат запроса кэшируется, а limit
+        и offset применяются к нему. Результат зависит от ключей одного
+        условия (любая подходящая книга имеет их все) - берётся условие
+        с наименьшим числом ключей.
+        """
+        criteria = {'author': author, 'genre': genre, 'year': year,
+                    'year_range': year_range, 'title_contains': title_contains}
+        criteria = {name: value for name, value in criteria.items() if value is not None}
+        if self.query_cache is None or not criteria:
+            return self.index_dict.query(limit=limit, offset=offset, **criteria)
+        dependencies = min((self.index_dict.dependencies(name, value)
+                            for name, value in criteria.items()), key=len)
+        books = self.query_cache.get(('query',) + tuple(sorted(criteria.items())), dependencies,
+                                     lambda: list(self.index_dict.query(**criteria)))
+        return islice(books, offset, None if limit is None else offset + limit)
+
+    def explain(self, author: Optional[str] = None, genre: Optional[str] = None,
+                year: Optional[int] = None, year_range: Optional[Tuple[int, int]] = None,
+                title_contains: Optional[str] = None) -> dict:
+        """План выполнения запроса query с теми же условиями"""
+        return self.index_dict.explain(author=author, genre=genre, year=year,
+                                       year_range=year_range, title_contains=title_contains)
 
     def get_all_books(self) -> BookCollection:
         """Получение всех книг"""
         return self.book_collection
 
     def update_book(self, old_isbn: str, new_book: 'Book') -> bool:
-        """Обновление информации о книге"""
-        old_book = self.find_by_isbn(old_isbn)
-        if old_book:
-            self.remove_book(old_book)
-            self.add_book(new_book)
-            return True
-        return False
+        """Обновление информации о книге
+
+        new_book занимает позицию старой книги в коллекции, а индексы
+        меняются только по изменившимся полям. Старый объект книги
+        не изменяется.
+        """
+        return self.apply_batch([('update', old_isbn, new_book)])[0]
+
+    def apply_batch(self, operations: Iterable[tuple]) -> List[bool]:
+        """Применение пачки операций, возвращает итог каждой операции
+
+        Операции: ('add', книга), ('remove', isbn), ('update', старый isbn, книга).
+        Сначала пачка целиком проверяется и сводится к итоговым изменениям
+        (книга, добавленная и удалённая в одной пачке, индексы не затрагивает),
+        затем журнал получает её одним кадром, и только после этого
+        изменения применяются: удаления, обновления и добавления - каждое
+        одним пакетом. Ошибка в любой операции обнаруживается до изменений,
+        и библиотека остаётся прежней. Семантика операций совпадает
+        с add_book, remove_book_by_isbn и update_book.
+        """
+        operations = list(operations)
+        index = self.index_dict
+        collection = self.book_collection
+        # Состояние по ходу пачки: ISBN -> книга (None - удалена)
+        current: Dict[str, Optional['Book']] = {}
+        # Для книг, уже изменённых пачкой: текущий ISBN -> исходный ISBN (None - новая книга)
+        origins: Dict[str, Optional[str]] = {}
+        added: Dict[str, 'Book'] = {}
+        updated: Dict[str, 'Book'] = {}
+        removed: List[str] = []
+
+        def lookup(isbn: str) -> Optional['Book']:
+            return current[isbn] if isbn in current else index.search_by_isbn(isbn)
+
+        def take(isbn: str) -> Optional[str]:
+            """Исключение книги из состояния пачки, возвращает исходный ISBN"""
+            origin = origins.pop(isbn) if isbn in origins else isbn
+            current[isbn] = None
+            if origin is None:
+                del added[isbn]
+            else:
+                updated.pop(origin, None)
+            return origin
+
+        results = []
+        for operation in operations:
+            kind = operation[0]
+            if kind == 'add':
+                book = operation[1]
+                if lookup(book.isbn) is not None:
+                    results.append(False)
+                    continue
+                current[book.isbn] = added[book.isbn] = book
+                origins[book.isbn] = None
+            elif kind == 'remove':
+                if lookup(operation[1]) is None:
+                    results.append(False)
+                    continue
+                origin = take(operation[1])
+                if origin is not None:
+                    removed.append(origin)
+            elif kind == 'update':
+                old_isbn, new_book = operation[1], operation[2]
+                if lookup(old_isbn) is None:
+                    results.append(False)
+                    continue
+                origin = take(old_isbn)
+                if new_book.isbn != old_isbn and lookup(new_book.isbn) is not None:
+                    # Как remove + add: новый ISBN занят, остаётся только удаление
+                    if origin is not None:
+                        removed.append(origin)
+                    results.append(True)
+                    continue
+                current[new_book.isbn] = new_book
+                origins[new_book.isbn] = origin
+                if origin is None:
+                    added[new_book.isbn] = new_book
+                else:
+                    updated[origin] = new_book
+            else:
+                raise ValueError(f"Неизвестная операция {kind}")
+            results.append(True)
+
+        if self._journal is not None:
+            self._journal.record_batch([operation for operation, ok in zip(operations, results)
+                                        if ok])
+        removed_books = [index.search_by_isbn(isbn) for isbn in removed]
+        for book in removed_books:
+            collection.remove(book)
+        index.remove_books(removed_books)
+        index.update_books([(index.search_by_isbn(isbn), new_book)
+                            for isbn, new_book in updated.items()])
+        collection.replace_many(updated.items())
+        index.add_books(collection.extend(added.values()))
+        return results
+
+    @contextmanager
+    def transaction(self) -> Iterator[Transaction]:
+        """Транзакция: изменения внутри блока with применяются одной пачкой
+
+        При исключении в блоке ни одно изменение не применяется.
+        """
+        transaction = Transaction()
+        yield transaction
+        transaction.results = self.apply_batch(transaction.operations)
+
+    def get_statistics(self, detail: Union[str, Iterable[str], None] = None,
+                       top: int = 10) -> dict:
+        """Получение статистики библиотеки
 
-    def get_statistics(self) -> dict:
-        """Получение статистики библиотеки"""
-        return {
-            'total_books': len(self.book_collection),
-            'total_authors': len(self.index_dict._index_by_author),
-            'years_range': list(self.index_dict._index_by_year.keys()),
-            'genres': list(self.index_dict._index_by_genre.keys())
-        }
\ No newline at end of file
+        Базовая сводка (книги, авторы, жанры, диапазон лет) считается за O(1),
+        раздел 'genres' (жанр -> число книг) - за O(число жанров); detail
+        ('authors', 'decades', 'years') добавляет подробные разделы. При включённой инструментации (collection_proect.instrumentation)
+        добавляется раздел 'operations' со статистикой вызовов и счётчиками.
+        """
+        statistics = self.index_dict.get_statistics(detail, top)
+        statistics['total_books'] = len(self.book_collection)
+        if self.query_cache is not None:
+            statistics['cache'] = self.query_cache.statistics()
+        if instrumentation.is_enabled():
+            statistics['operations'] = instrumentation.snapshot()
+        return statistics
\ No newline at end of file
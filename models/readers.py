@@ -0,0 +1,33 @@
+import csv
+import json
+from typing import Iterator
+from models.book import Book
+
+
+FIELDS = ('title', 'author', 'year', 'genre', 'isbn')
+
+
+def read_csv(path: str) -> Iterator[Book]:
+    """Потоковое чтение книг из CSV с заголовком title,author,year,genre,isbn"""
+    with open(path, encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            yield Book(row['title'], row['author'], int(row['year']), row['genre'], row['isbn'])
+
+
+def read_jsonl(path: str) -> Iterator[Book]:
+    """Потоковое чтение книг из JSON Lines (один объект на строку)"""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                data = json.loads(line)
+                yield Book(data['title'], data['author'], int(data['year']),
+                           data['genre'], data['isbn'])
+
+
+def read_books(path: str) -> Iterator[Book]:
+    """Выбор читателя по расширению файла (.csv, .jsonl)"""
+    if path.endswith('.csv'):
+        return read_csv(path)
+    if path.endswith(('.jsonl', '.ndjson')):
+        return read_jsonl(path)
+    raise ValueError(f"Неизвестный формат файла {path}")
@@ -0,0 +1,412 @@
+import multiprocessing
+import zlib
+from contextlib import contextmanager
+from heapq import nlargest, nsmallest
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collection_proect.book_collection import BookCollection
+from models.library import Library
+
+
+# Методы Library, которые можно вызвать в процессе сегмента
+SHARD_METHODS = frozenset({
+    'add_book', 'add_books', 'remove_book', 'remove_book_by_isbn', 'update_book',
+    'find_by_isbn', 'find_by_author', 'find_by_genre', 'find_by_year',
+    'find_by_year_range', 'find_by_title', 'search_text', 'query', 'get_all_books',
+    'complete_author', 'complete_title', 'fuzzy_author', 'fuzzy_title', 'apply_batch',
+})
+
+
+def _shard_statistics(library: Library, detail: Union[str, Iterable[str], None]) -> dict:
+    """Статистика сегмента в виде, пригодном для объединения"""
+    details = {detail} if isinstance(detail, str) else set(detail or ())
+    index = library.index_dict
+    statistics = index.get_statistics(details - {'authors'})
+    # Авторы и жанры в разных сегментах пересекаются: нужны полные счётчики
+    statistics['authors'] = index.count_by_author()
+    statistics['genres'] = index.count_by_genre()
+    return statistics
+
+
+def _execute(library: Library, method: str, args: tuple) -> Any:
+    """Выполнение одного вызова в процессе сегмента"""
+    if method == 'statistics':
+        return _shard_statistics(library, *args)
+    if method == 'count':
+        return len(library.book_collection)
+    if method == 'completion_counts':
+        return library.index_dict.completion_counts(*args)
+    if method not in SHARD_METHODS:
+        raise AttributeError(f"Метод {method} недоступен в сегменте")
+    result = getattr(library, method)(*args)
+    if isinstance(result, (BookCollection, Iterator)):
+        return list(result)
+    return result
+
+
+def _shard_worker(connection, name: str) -> None:
+    """Цикл процесса сегмента: пачка вызовов на входе, пачка результатов на выходе"""
+    library = Library(name)
+    while True:
+        calls = connection.recv()
+        if calls is None:
+            break
+        results = []
+        for method, args in calls:
+            try:
+                results.append((True, _execute(library, method, args)))
+            except Exception as error:
+                results.append((False, error))
+        connection.send(results)
+    connection.close()
+
+
+class ShardedLibrary:
+    """Библиотека, разбитая на сегменты в отдельных процессах
+
+    Книги распределяются по сегментам по хешу ISBN (crc32, не зависит
+    от запуска). Поиск и изменение по ISBN обращаются к одному сегменту,
+    поиск по автору, жанру, году и тексту рассылается всем сегментам
+    параллельно, а результаты объединяются в порядке номеров сегментов.
+
+    Процесс сегмента получает вызовы пачками: add_books отправляет каждому
+    сегменту один список книг, а внутри batch() изменения копятся
+    и уходят одним сообщением на сегмент.
+    """
+
+    def __init__(self, name: str = "Библиотека", shards: int = 4, batch_size: int = 1000):
+        self.name = name
+        self.batch_size = batch_size
+        self._connections = []
+        self._processes = []
+        for number in range(shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_worker, args=(child, f"{name} #{number}"),
+                                              name=f"library-shard-{number}", daemon=True)
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+        self._pending: Optional[List[List[Tuple[str, tuple]]]] = None
+
+    def __repr__(self) -> str:
+        """Строковое представление библиотеки"""
+        return f"ShardedLibrary('{self.name}', сегментов: {len(self._connections)})"
+
+    def __len__(self) -> int:
+        """Количество книг во всех сегментах"""
+        return sum(self._scatter('count'))
+
+    def __enter__(self) -> 'ShardedLibrary':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Остановка процессов сегментов"""
+        if self._pending is not None:
+            self._flush()
+        for connection in self._connections:
+            connection.send(None)
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def shard_of(self, isbn: str) -> int:
+        """Номер сегмента, в котором хранится книга с данным ISBN"""
+        return zlib.crc32(isbn.encode('utf-8')) % len(self._connections)
+
+    # Обмен с сегментами
+
+    def _exchange(self, calls: Dict[int, List[Tuple[str, tuple]]]) -> Dict[int, List[Any]]:
+        """Отправка пачек вызовов сегментам и сбор ответов
+
+        Сначала отправляются все пачки, затем читаются ответы, поэтому
+        сегменты выполняют свои пачки одновременно.
+        """
+        for number, batch in calls.items():
+            self._connections[number].send(batch)
+        replies = {number: self._connections[number].recv() for number in calls}
+        results = {}
+        for number, reply in replies.items():
+            results[number] = []
+            for ok, value in reply:
+                if not ok:
+                    raise value
+                results[number].append(value)
+        return results
+
+    def _flush(self) -> None:
+        """Отправка накопленных в batch() изменений"""
+        pending, self._pending = self._pending, [[] for _ in self._connections]
+        self._exchange({number: calls for number, calls in enumerate(pending) if calls})
+
+    def _call(self, number: int, method: str, *args: Any) -> Any:
+        """Вызов метода в одном сегменте"""
+        if self._pending is not None:
+            self._flush()
+        return self._exchange({number: [(method, args)]})[number][0]
+
+    def _write(self, number: int, method: str, *args: Any) -> Any:
+        """Изменение в сегменте (в batch() откладывается, результат - None)"""
+        if self._pending is None:
+            return self._call(number, method, *args)
+        self._pending[number].append((method, args))
+        if len(self._pending[number]) >= self.batch_size:
+            self._flush()
+        return None
+
+    def _scatter(self, method: str, *args: Any) -> List[Any]:
+        """Вызов метода во всех сегментах, результаты по порядку сегментов"""
+        if self._pending is not None:
+            self._flush()
+        results = self._exchange({number: [(method, args)]
+                                  for number in range(len(self._connections))})
+        return [results[number][0] for number in range(len(self._connections))]
+
+    def _gather(self, method: str, *args: Any) -> BookCollection:
+        """Объединение списков книг, найденных всеми сегментами"""
+        return BookCollection([book for books in self._scatter(method, *args) for book in books])
+
+    @contextmanager
+    def batch(self) -> Iterator['ShardedLibrary']:
+        """Пачка изменений: по одному сообщению на сегмент каждые batch_size вызовов
+
+        Методы изменения внутри пачки возвращают None (кроме update_book
+        с переносом книги в другой сегмент). Поиск внутри пачки сначала
+        отправляет накопленные изменения.
+        """
+        if self._pending is not None:
+            yield self
+            return
+        self._pending = [[] for _ in self._connections]
+        try:
+            yield self
+        finally:
+            self._flush()
+            self._pending = None
+
+    # Изменение
+
+    def add_book(self, book: 'Book') -> Optional[bool]:
+        """Добавление книги"""
+        return self._write(self.shard_of(book.isbn), 'add_book', book)
+
+    def add_books(self, books: Iterable['Book'], chunk_size: int = 10_000) -> int:
+        """Пакетное добавление книг, возвращает число добавленных
+
+        Книги раскладываются по сегментам, каждые chunk_size книг
+        отправляются одним сообщением на сегмент.
+        """
+        added = 0
+        books = iter(books)
+        while True:
+            chunk = list(islice(books, chunk_size))
+            if not chunk:
+                return added
+            parts: Dict[int, List['Book']] = {}
+            for book in chunk:
+                parts.setdefault(self.shard_of(book.isbn), []).append(book)
+            if self._pending is not None:
+                self._flush()
+            results = self._exchange({number: [('add_books', (part,))]
+                                      for number, part in parts.items()})
+            added += sum(counts[0] for counts in results.values())
+
+    def remove_book(self, book: 'Book') -> Optional[bool]:
+        """Удаление книги"""
+        return self._write(self.shard_of(book.isbn), 'remove_book', book)
+
+    def remove_book_by_isbn(self, isbn: str) -> Optional[bool]:
+        """Удаление книги по ISBN"""
+        return self._write(self.shard_of(isbn), 'remove_book_by_isbn', isbn)
+
+    def update_book(self, old_isbn: str, new_book: 'Book') -> Optional[bool]:
+        """Обновление информации о книге
+
+        Если новый ISBN попадает в другой сегмент, книга удаляется
+        из старого сегмента и добавляется в новый. Добавление зависит
+        от успеха удаления, поэтому такое обновление и внутри batch()
+        выполняется сразу (после накопленных изменений) и возвращает итог.
+        """
+        old_shard, new_shard = self.shard_of(old_isbn), self.shard_of(new_book.isbn)
+        if old_shard == new_shard:
+            return self._write(old_shard, 'update_book', old_isbn, new_book)
+        return self._move(old_isbn, new_book)
+
+    def _move(self, old_isbn: str, new_book: 'Book') -> bool:
+        """Перенос книги в другой сегмент: удаление и добавление (как Library.update_book)"""
+        if not self._call(self.shard_of(old_isbn), 'remove_book_by_isbn', old_isbn):
+            return False
+        self._call(self.shard_of(new_book.isbn), 'add_book', new_book)
+        return True
+
+    def apply_batch(self, operations: Iterable[tuple]) -> List[bool]:
+        """Пачка операций (см. Library.apply_batch): одно сообщение на сегмент
+
+        Пачка каждого сегмента применяется целиком или никак. Обновление,
+        переносящее книгу в другой сегмент, делит пачку: операции до него
+        отправляются сегментам, затем книга переносится, поэтому операции
+        выполняются в порядке пачки.
+        """
+        operations = list(operations)
+        for operation in operations:
+            if operation[0] not in ('add', 'remove', 'update'):
+                raise ValueError(f"Неизвестная операция {operation[0]}")
+        if self._pending is not None:
+            self._flush()
+        results: List[Optional[bool]] = [None] * len(operations)
+        parts: Dict[int, List[tuple]] = {}
+        places: List[Tuple[int, int, int]] = []
+
+        def send() -> None:
+            replies = self._exchange({number: [('apply_batch', (part,))]
+                                      for number, part in parts.items()})
+            for position, number, offset in places:
+                results[position] = replies[number][0][offset]
+            parts.clear()
+            places.clear()
+
+        for position, operation in enumerate(operations):
+            kind = operation[0]
+            if kind == 'add':
+                number = self.shard_of(operation[1].isbn)
+            else:
+                number = self.shard_of(operation[1])
+                if kind == 'update' and number != self.shard_of(operation[2].isbn):
+                    send()
+                    results[position] = self._move(*operation[1:])
+                    continue
+            places.append((position, number, len(parts.setdefault(number, []))))
+            parts[number].append(operation)
+        send()
+        return results
+
+    # Поиск
+
+    def find_by_isbn(self, isbn: str) -> Optional['Book']:
+        """Поиск книги по ISBN"""
+        return self._call(self.shard_of(isbn), 'find_by_isbn', isbn)
+
+    def find_by_author(self, author: str) -> BookCollection:
+        """Поиск книг по автору"""
+        return self._gather('find_by_author', author)
+
+    def find_by_genre(self, genre: str) -> BookCollection:
+        """Поиск книг по жанру"""
+        return self._gather('find_by_genre', genre)
+
+    def find_by_year(self, year: int) -> BookCollection:
+        """Поиск книг по году"""
+        return self._gather('find_by_year', year)
+
+    def find_by_year_range(self, start: int, end: int) -> BookCollection:
+        """Поиск книг, изданных с start по end включительно"""
+        return self._gather('find_by_year_range', start, end)
+
+    def find_by_title(self, title_part: str) -> BookCollection:
+        """Поиск книг по части названия"""
+        return self._gather('find_by_title', title_part)
+
+    def search_text(self, query: str) -> BookCollection:
+        """Поиск книг по подстроке в любом поле"""
+        return self._gather('search_text', query)
+
+    def _merge_ranked(self, method: str, field: str, *args: Any, k: int) -> List[Tuple[str, int]]:
+        """Объединение ранжированных списков сегментов с суммированием книг
+
+        Кандидаты - k лучших значений каждого сегмента. Сегмент, вернувший
+        полный список из k значений, может хранить книги и других
+        кандидатов, поэтому вторым обменом у таких сегментов запрашиваются
+        точные числа книг недостающих кандидатов. Значение, не вошедшее
+        ни в один список, в результат не попадает.
+        """
+        parts = self._scatter(method, *args, k)
+        counts: Dict[str, int] = {}
+        for part in parts:
+            for value, count in part:
+                counts[value] = counts.get(value, 0) + count
+        unlisted: Dict[int, List[str]] = {}
+        for number, part in enumerate(parts):
+            if len(part) == k:
+                listed = {value for value, _ in part}
+                values = [value for value in counts if value not in listed]
+                if values:
+                    unlisted[number] = values
+        if unlisted:
+            replies = self._exchange({number: [('completion_counts', (field, values))]
+                                      for number, values in unlisted.items()})
+            for number, values in unlisted.items():
+                for value, count in zip(values, replies[number][0]):
+                    counts[value] += count
+        return nsmallest(k, counts.items(), key=lambda item: (-item[1], item[0]))
+
+    def complete_author(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Автодополнение автора (см. Library.complete_author)"""
+        return self._merge_ranked('complete_author', 'author', prefix, k=k)
+
+    def complete_title(self, prefix: str, k: int = 10) -> List[Tuple[str, int]]:
+        """Автодополнение названия (см. Library.complete_title)"""
+        return self._merge_ranked('complete_title', 'title', prefix, k=k)
+
+    def fuzzy_author(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Нечёткий поиск автора (результаты сегментов ранжируются по числу книг)"""
+        return self._merge_ranked('fuzzy_author', 'author', text, max_distance, k=k)
+
+    def fuzzy_title(self, text: str, max_distance: int = 2, k: int = 10) -> List[Tuple[str, int]]:
+        """Нечёткий поиск названия (результаты сегментов ранжируются по числу книг)"""
+        return self._merge_ranked('fuzzy_title', 'title', text, max_distance, k=k)
+
+    def query(self, author: Optional[str] = None, genre: Optional[str] = None,
+              year: Optional[int] = None, year_range: Optional[Tuple[int, int]] = None,
+              title_contains: Optional[str] = None, limit: Optional[int] = None,
+              offset: int = 0) -> Iterator['Book']:
+        """Поиск книг по нескольким условиям (см. Library.query)
+
+        Каждый сегмент возвращает не больше offset + limit книг,
+        offset и limit применяются к объединённому результату.
+        """
+        per_shard = None if limit is None else offset + limit
+        found = self._scatter('query', author, genre, year, year_range, title_contains, per_shard)
+        books = [book for part in found for book in part]
+        return islice(books, offset, None if limit is None else offset + limit)
+
+    def get_all_books(self) -> BookCollection:
+        """Получение всех книг"""
+        return self._gather('get_all_books')
+
+    def get_statistics(self, detail: Union[str, Iterable[str], None] = None,
+                       top: int = 10) -> dict:
+        """Получение статистики библиотеки (объединение статистики сегментов)"""
+        details = {detail} if isinstance(detail, str) else set(detail or ())
+        parts = self._scatter('statistics', detail)
+        authors: Dict[str, int] = {}
+        genres: Dict[str, int] = {}
+        for part in parts:
+            for author, count in part['authors'].items():
+                authors[author] = authors.get(author, 0) + count
+            for genre, count in part['genres'].items():
+                genres[genre] = genres.get(genre, 0) + count
+        starts = [part['years_range'][0] for part in parts if part['years_range'][0] is not None]
+        ends = [part['years_range'][1] for part in parts if part['years_range'][1] is not None]
+        statistics = {
+            'total_books': sum(part['total_books'] for part in parts),
+            'total_authors': len(authors),
+            'total_genres': len(genres),
+            'years_range': (min(starts, default=None), max(ends, default=None)),
+            'genres': genres,
+        }
+        if 'authors' in details:
+            statistics['authors'] = dict(nlargest(top, authors.items(), key=lambda item: item[1]))
+        if 'decades' in details:
+            decades: Dict[int, int] = {}
+            for part in parts:
+                for decade, count in part['decades'].items():
+                    decades[decade] = decades.get(decade, 0) + count
+            statistics['decades'] = dict(sorted(decades.items()))
+        if 'years' in details:
+            statistics['years'] = sorted({year for part in parts for year in part['years']})
+        return statistics
@@ -0,0 +1,191 @@
+import json
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from models.book import Book
+
+
+# Версия формата трассы (первая строка файла)
+VERSION = 1
+# Методы, вызовы которых записываются в трассу
+TRACED = ('add_book', 'add_books', 'remove_book_by_isbn', 'update_book', 'find_by_isbn',
+          'find_by_author', 'find_by_genre', 'find_by_year', 'find_by_year_range',
+          'find_by_title', 'search_text')
+
+
+def book_fields(book: 'Book') -> list:
+    """Поля книги в порядке конструктора"""
+    return [book.title, book.author, book.year, book.genre, book.isbn]
+
+
+def checksum(result: Any) -> int:
+    """Контрольная сумма результата операции
+
+    Для набора книг сумма не зависит от порядка: разные реализации
+    (например, сегментированная библиотека) могут возвращать книги
+    в другом порядке.
+    """
+    if isinstance(result, Book):
+        data = repr(book_fields(result))
+    elif result is None or isinstance(result, (bool, int)):
+        data = repr(result)
+    else:
+        data = '\n'.join(sorted(repr(book_fields(book)) for book in result))
+    return zlib.crc32(data.encode('utf-8'))
+
+
+class TraceWriter:
+    """Запись трассы операций в формате JSON Lines
+
+    Первая строка - заголовок {"trace": VERSION, ...}, затем строки
+    ["setup", [поля книги]] с начальным каталогом и строки операций
+    [метод, [аргументы], контрольная сумма результата].
+    """
+
+    def __init__(self, file: TextIO, **metadata: Any):
+        self.file = file
+        self.operations = 0
+        self._write(dict(metadata, trace=VERSION))
+
+    def _write(self, record: Any) -> None:
+        """Одна строка трассы"""
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def write_setup(self, books: Iterable['Book']) -> None:
+        """Начальный каталог: при воспроизведении загружается без замера времени"""
+        for book in books:
+            self._write(['setup', book_fields(book)])
+
+    def write(self, method: str, args: list, result: Any) -> None:
+        """Операция с аргументами и контрольной суммой результата"""
+        self._write([method, args, checksum(result)])
+        self.operations += 1
+
+
+def _encode_args(method: str, args: tuple) -> list:
+    """Аргументы вызова в виде, пригодном для JSON"""
+    if method == 'add_book':
+        return [book_fields(args[0])]
+    if method == 'add_books':
+        return [[book_fields(book) for book in args[0]]]
+    if method == 'update_book':
+        return [args[0], book_fields(args[1])]
+    return list(args)
+
+
+def _decode_args(method: str, args: list) -> list:
+    """Аргументы вызова из строки трассы"""
+    if method == 'add_book':
+        return [Book(*args[0])]
+    if method == 'add_books':
+        return [[Book(*fields) for fields in args[0]]]
+    if method == 'update_book':
+        return [args[0], Book(*args[1])]
+    return args
+
+
+class TracingLibrary:
+    """Обёртка над Library, записывающая операции в трассу
+
+    Поддерживаемые вызовы (TRACED и remove_book, который записывается
+    как удаление по ISBN) выполняются и записываются вместе с контрольной
+    суммой результата; остальные атрибуты берутся у библиотеки напрямую.
+    """
+
+    def __init__(self, library: Any, writer: TraceWriter):
+        self._library = library
+        self._writer = writer
+
+    def __getattr__(self, name: str) -> Any:
+        """Атрибуты библиотеки; методы из TRACED - с записью в трассу"""
+        attribute = getattr(self._library, name)
+        if name not in TRACED:
+            return attribute
+
+        def traced(*args: Any) -> Any:
+            if name == 'add_books':
+                args = (list(args[0]),) + args[1:]
+            result = attribute(*args)
+            self._writer.write(name, _encode_args(name, args), result)
+            return result
+        return traced
+
+    def __repr__(self) -> str:
+        """Строковое представление обёртки"""
+        return f"TracingLibrary({self._library!r})"
+
+    def remove_book(self, book: 'Book') -> bool:
+        """Удаление книги (записывается как удаление по ISBN)"""
+        result = self._library.remove_book_by_isbn(book.isbn)
+        self._writer.write('remove_book_by_isbn', [book.isbn], result)
+        return result
+
+
+def read_trace(path: str) -> Tuple[dict, Iterator[list]]:
+    """Заголовок трассы и поток её строк (читается по одной строке)"""
+    file = open(path, encoding='utf-8')
+    header = json.loads(file.readline())
+    if header.get('trace') != VERSION:
+        file.close()
+        raise ValueError(f"Неподдерживаемая версия трассы: {header.get('trace')}")
+
+    def records() -> Iterator[list]:
+        with file:
+            for line in file:
+                yield json.loads(line)
+    return header, records()
+
+
+def replay(library: Any, path: str, setup_chunk: int = 10_000) -> dict:
+    """Воспроизведение трассы на любой библиотеке с интерфейсом Library
+
+    Начальный каталог загружается через add_books без замера времени,
+    затем операции выполняются подряд. Возвращает задержки каждой
+    операции в наносекундах (по методам), общее время, итоговую
+    контрольную сумму и число расхождений с суммами из трассы.
+    """
+    header, records = read_trace(path)
+    latencies: Dict[str, List[int]] = {}
+    setup: List['Book'] = []
+    combined = 0
+    mismatches = 0
+    first_mismatch: Optional[int] = None
+    operations = 0
+    elapsed = 0
+    clock = time.perf_counter_ns
+    for line, record in enumerate(records, 2):
+        if record[0] == 'setup':
+            setup.append(Book(*record[1]))
+            if len(setup) >= setup_chunk:
+                library.add_books(setup)
+                setup = []
+            continue
+        if setup:
+            library.add_books(setup)
+            setup = []
+        method, args, expected = record
+        call = getattr(library, method)
+        args = _decode_args(method, args)
+        start = clock()
+        result = call(*args)
+        spent = clock() - start
+        elapsed += spent
+        latencies.setdefault(method, []).append(spent)
+        operations += 1
+        actual = checksum(result)
+        combined = zlib.crc32(actual.to_bytes(4, 'little'), combined)
+        if actual != expected:
+            mismatches += 1
+            if first_mismatch is None:
+                first_mismatch = line
+    if setup:
+        library.add_books(setup)
+    return {
+        'header': header,
+        'operations': operations,
+        'seconds': elapsed / 1e9,
+        'latencies_ns': latencies,
+        'checksum': combined,
+        'mismatches': mismatches,
+        'first_mismatch_line': first_mismatch,
+    }
@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+# Поиск по точному ключу: путь запроса -> метод библиотеки
+LOOKUPS = {
+    '/author': 'find_by_author',
+    '/genre': 'find_by_genre',
+    '/year': 'find_by_year',
+    '/isbn': 'find_by_isbn',
+}
+# Поиск с просмотром: выполняется в пуле потоков
+SCANS = {
+    '/title': 'find_by_title',
+    '/search': 'search_text',
+}
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+# Больше книг в одном ответе не выдаётся
+MAX_LIMIT = 1000
+
+
+def encode_result(result: Any, limit: int) -> bytes:
+    """Ответ в JSON: число найденных книг и первые limit книг"""
+    if result is None:
+        books = []
+    elif hasattr(result, 'get_info'):
+        books = [result]
+    else:
+        books = result
+    return json.dumps({'count': len(books),
+                       'books': [book.get_info() for book in islice(books, limit)]},
+                      ensure_ascii=False).encode('utf-8')
+
+
+class LibraryService:
+    """HTTP-сервис поиска по библиотеке на asyncio
+
+    Запросы по автору, жанру, году и ISBN не выполняются сразу:
+    они копятся в течение window секунд (или до max_batch запросов)
+    и выполняются одной пачкой. Одинаковые запросы, ожидающие ответа,
+    объединяются - индекс опрашивается и ответ кодируется один раз.
+    Поиск по названию и тексту выполняется в пуле потоков (по умолчанию
+    из одного потока: индекс триграмм и кэш запросов изменяются при
+    чтении), совпадающие запросы, которые ещё выполняются, тоже объединяются.
+
+    Сервис только читает библиотеку; изменять её во время работы
+    сервиса можно через ConcurrentLibrary. ShardedLibrary не подходит:
+    её каналы к процессам нельзя использовать из двух потоков сразу.
+    """
+
+    def __init__(self, library: Any, host: str = '127.0.0.1', port: int = 8080,
+                 window: float = 0.0005, max_batch: int = 256, scan_workers: int = 1):
+        self.library = library
+        self.host = host
+        self.port = port
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = Counter()
+        self._executor = ThreadPoolExecutor(max_workers=scan_workers,
+                                            thread_name_prefix='library-scan')
+        self._server: Optional[asyncio.AbstractServer] = None
+        # Ожидающие ответа запросы: (метод, ключ, limit) -> future с готовым ответом
+        self._in_flight: Dict[Tuple[str, Any, int], asyncio.Future] = {}
+        self._batch: Dict[Tuple[str, Any, int], asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def __repr__(self) -> str:
+        """Строковое представление сервиса"""
+        return f"LibraryService({self.host}:{self.port})"
+
+    def warm(self) -> None:
+        """Полная загрузка библиотеки до приёма запросов
+
+        Library, открытая из снимка, строит коллекцию и индексы при первом
+        обращении к ним. Если это произойдёт в потоке поиска по названию,
+        поиск по автору в цикле событий прочитает наполовину построенный индекс.
+        """
+        # Обращение к index_dict у Library из снимка загружает все книги
+        getattr(self.library, 'index_dict', None)
+
+    async def start(self) -> None:
+        """Запуск сервера (port=0 - свободный порт)"""
+        self.warm()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Запуск и обслуживание запросов до отмены"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Остановка сервера и пула потоков"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=True)
+
+    def statistics(self) -> dict:
+        """Счётчики: запросы, пачки, объединённые запросы, обращения к индексу"""
+        return dict(self.stats)
+
+    # Пачки и объединение запросов
+
+    def lookup(self, method: str, key: Any, limit: int) -> asyncio.Future:
+        """Поиск по точному ключу через пачку (ответ - закодированный JSON)"""
+        request = (method, key, limit)
+        future = self._in_flight.get(request)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return future
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[request] = future
+        self._batch[request] = future
+        if len(self._batch) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        """Выполнение накопленной пачки поисков"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, {}
+        self.stats['batches'] += 1
+        for request, future in batch.items():
+            method, key, limit = request
+            del self._in_flight[request]
+            self.stats['index_accesses'] += 1
+            try:
+                future.set_result(encode_result(getattr(self.library, method)(key), limit))
+            except Exception as error:
+                future.set_exception(error)
+
+    def scan(self, method: str, query: str, limit: int) -> asyncio.Future:
+        """Поиск с просмотром в пуле потоков (совпадающие запросы объединяются)"""
+        request = (method, query, limit)
+        future = self._in_flight.get(request)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._executor, lambda: encode_result(getattr(self.library, method)(query), limit))
+        self._in_flight[request] = future
+        future.add_done_callback(lambda _: self._in_flight.pop(request, None))
+        self.stats['scans'] += 1
+        return future
+
+    # HTTP
+
+    async def _dispatch(self, target: str) -> Tuple[int, bytes]:
+        """Ответ на запрос: (код состояния, тело)"""
+        parts = urlsplit(target)
+        params = {name: values[0] for name, values in parse_qs(parts.query).items()}
+        if parts.path == '/stats':
+            return 200, json.dumps(self.statistics()).encode('utf-8')
+        if parts.path not in LOOKUPS and parts.path not in SCANS:
+            return 404, b'{"error": "unknown path"}'
+        query = params.get('q')
+        try:
+            limit = int(params.get('limit', 50))
+            if parts.path == '/year' and query is not None:
+                query = int(query)
+        except ValueError:
+            return 400, b'{"error": "bad number"}'
+        if limit < 0:
+            return 400, b'{"error": "negative limit"}'
+        limit = min(limit, MAX_LIMIT)
+        if query is None:
+            return 400, b'{"error": "missing q"}'
+        if parts.path in LOOKUPS:
+            return 200, await self.lookup(LOOKUPS[parts.path], query, limit)
+        return 200, await self.scan(SCANS[parts.path], query, limit)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Соединение HTTP/1.1 с поддержкой keep-alive"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    _, target, version = line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip().lower()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection') != 'close'
+                self.stats['requests'] += 1
+                try:
+                    status, body = await self._dispatch(target)
+                except Exception:
+                    # Ошибка библиотеки не должна оставлять клиента без ответа
+                    self.stats['errors'] += 1
+                    status, body = 500, b'{"error": "internal error"}'
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                             .encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def main() -> None:
+    """Запуск сервиса над демонстрационной библиотекой или снимком"""
+    from main import create_library
+    from models.library import Library
+
+    parser = argparse.ArgumentParser(description="HTTP-сервис поиска по библиотеке")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--snapshot", help="снимок библиотеки (иначе демонстрационный каталог)")
+    parser.add_argument("--window", type=float, default=0.0005,
+                        help="окно накопления пачки, секунд")
+    args = parser.parse_args()
+    library = Library.load_snapshot(args.snapshot) if args.snapshot else create_library()
+    service = LibraryService(library, args.host, args.port, window=args.window)
+    print(f"Сервис слушает http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from models.book import Book
+from models.library import Library
+
+
+def test_remove_by_isbn_with_other_fields():
+    library = Library("Удаление")
+    library.add_book(Book("Alpha", "Author", 2000, "Novel", "1"))
+    library.add_book(Book("Alpha two", "Author", 2001, "Novel", "2"))
+    assert library.remove_book(Book("Other", "Someone", 1999, "H", "1"))
+    assert [book.isbn for book in library.find_by_title("alpha")] == ["2"]
+    assert [book.isbn for book in library.find_by_author("Author")] == ["2"]
+    statistics = library.get_statistics()
+    assert statistics['total_authors'] == 1
+    assert statistics['years_range'] == (2001, 2001)
+
+
+def test_wide_year_range_depends_on_everything():
+    library = Library("Кэш")
+    library.add_book(Book("Alpha", "Author", 2000, "Novel", "1"))
+    assert library.index_dict.dependencies('year_range', (-10 ** 9, 10 ** 9)) == [('all',)]
+    library.enable_cache()
+    assert len(library.find_by_year_range(-10 ** 9, 10 ** 9)) == 1
+    library.add_book(Book("Beta", "Author", -500, "Novel", "2"))
+    assert len(library.find_by_year_range(-10 ** 9, 10 ** 9)) == 2
+
+
+def test_default_statistics_list_genres():
+    library = Library("Статистика")
+    library.add_book(Book("Alpha", "Author", 2000, "Novel", "1"))
+    library.add_book(Book("Beta", "Author", 2001, "Poem", "2"))
+    assert sorted(library.get_statistics()['genres']) == ["Novel", "Poem"]
+    assert library.get_statistics('genres')['genres'] == {"Novel": 1, "Poem": 1}
@@ -0,0 +1,37 @@
+import os
+import pytest
+from models.book import Book
+from models.library import Library
+
+
+def test_compact_without_journal():
+    with pytest.raises(RuntimeError):
+        Library("Без журнала").compact_journal()
+
+
+def test_failed_background_compaction_keeps_segments(tmp_path):
+    library = Library("Журнал")
+    library.open_journal(str(tmp_path), fsync_interval=None)
+    library.add_book(Book("Книга", "Автор", 2000, "Роман", "1"))
+    library.name = None  # запись снимка упадёт на кодировании имени
+    library.compact_journal().join()
+    assert isinstance(library.compaction_error, AttributeError)
+    library.name = "Журнал"
+    library.close_journal()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+    recovered = Library.recover(str(tmp_path))
+    assert [book.isbn for book in recovered.book_collection] == ["1"]
+    recovered.close_journal()
+
+
+def test_compaction_replaces_segments(tmp_path):
+    library = Library("Журнал")
+    library.open_journal(str(tmp_path), fsync_interval=None)
+    library.add_books(Book(f"Книга {i}", "Автор", 2000, "Роман", str(i)) for i in range(3))
+    library.compact_journal(background=False)
+    library.remove_book_by_isbn("0")
+    library.close_journal()
+    assert library.compaction_error is None
+    recovered = Library.recover(str(tmp_path))
+    assert [book.isbn for book in recovered.book_collection] == ["1", "2"]
+    recovered.close_journal()
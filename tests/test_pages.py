@@ -0,0 +1,49 @@
+from models.book import Book
+from models.library import Library
+
+
+def make_library(count):
+    library = Library("Тест")
+    for i in range(count):
+        library.add_book(Book(f"Книга {i}", "Автор", 2000, "Роман", str(i)))
+    return library
+
+
+def pages(collection, size):
+    result = []
+    page = collection.page(size=size)
+    result.append([book.isbn for book in page.books])
+    while page.next_cursor is not None:
+        page = collection.page(page.next_cursor, size=size)
+        result.append([book.isbn for book in page.books])
+    return result
+
+
+def test_search_pages_survive_removal():
+    library = make_library(6)
+    found = library.find_by_author("Автор")
+    first = found.page(size=2)
+    library.remove_book_by_isbn("0")
+    second = found.page(first.next_cursor, size=2)
+    assert [book.isbn for book in first.books] == ['0', '1']
+    assert [book.isbn for book in second.books] == ['2', '3']
+
+
+def test_search_pages_survive_append():
+    library = make_library(4)
+    found = library.find_by_author("Автор")
+    first = found.page(size=2)
+    library.add_book(Book("Новая", "Автор", 2001, "Роман", "9"))
+    assert pages(found, 2) == [['0', '1'], ['2', '3']]
+    assert first.next_cursor is not None
+
+
+def test_search_result_is_a_snapshot():
+    library = make_library(4)
+    found = library.find_by_author("Автор")
+    assert Book("", "", 0, "", "1") in found
+    library.remove_book_by_isbn("0")
+    assert len(found) == 4
+    assert found.remove(Book("", "", 0, "", "2"))
+    assert [book.isbn for book in found] == ['0', '1', '3']
+    assert len(library.find_by_author("Автор")) == 3
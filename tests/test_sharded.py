@@ -0,0 +1,48 @@
+import random
+from models.book import Book
+from models.library import Library
+from models.sharded_library import ShardedLibrary
+
+
+def make_books(count, seed=3):
+    rng = random.Random(seed)
+    return [Book(f"Название {rng.randint(0, 300)}", f"Автор {int(rng.paretovariate(0.8)) % 200}",
+                 2000, "Роман", str(i)) for i in range(count)]
+
+
+def test_completion_counts_are_exact():
+    books = make_books(5000)
+    library = Library("Тест")
+    library.add_books(books)
+    with ShardedLibrary("Тест", shards=4) as sharded:
+        sharded.add_books(books)
+        for method in ('complete_author', 'complete_title'):
+            for prefix in ("автор", "автор 1", "назв", "название 2"):
+                exact = dict(getattr(library, method)(prefix, 10 ** 6))
+                for value, count in getattr(sharded, method)(prefix, 3):
+                    assert count == exact[value], (method, prefix, value)
+
+
+def test_apply_batch_moves_in_operation_order():
+    with ShardedLibrary("Тест", shards=4) as sharded:
+        old_isbn = "A1"
+        new_isbn = next(f"X{i}" for i in range(100)
+                        if sharded.shard_of(f"X{i}") != sharded.shard_of(old_isbn))
+        operations = [('update', old_isbn, Book("Новая", "Автор", 2001, "Роман", new_isbn)),
+                      ('add', Book("Снова", "Автор", 2002, "Роман", old_isbn))]
+        library = Library("Тест")
+        for target in (library, sharded):
+            target.add_book(Book("Старая", "Автор", 2000, "Роман", old_isbn))
+        assert sharded.apply_batch(operations) == library.apply_batch(operations) == [True, True]
+        assert sharded.find_by_isbn(old_isbn).title == "Снова"
+        assert sharded.find_by_isbn(new_isbn).title == "Новая"
+
+
+def test_batched_move_of_missing_book():
+    with ShardedLibrary("Тест", shards=4) as sharded:
+        new_isbn = next(f"X{i}" for i in range(100)
+                        if sharded.shard_of(f"X{i}") != sharded.shard_of("MISSING"))
+        with sharded.batch():
+            assert sharded.update_book("MISSING", Book("Новая", "Автор", 2001, "Роман", new_isbn)) is False
+        assert sharded.find_by_isbn(new_isbn) is None
+        assert len(sharded) == 0
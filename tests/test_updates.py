@@ -0,0 +1,57 @@
+from collection_proect.book_store import BookStore
+from models.book import Book
+from models.library import Library
+
+
+def scan(library: Library, title_part: str) -> list:
+    """Поиск по названию полным просмотром коллекции"""
+    return [book.isbn for book in library.book_collection
+            if title_part.lower() in book.title.lower()]
+
+
+def test_isbn_chain_keeps_trigram_index():
+    library = Library("Цепочка")
+    library.add_book(Book("A story", "Автор", 2000, "Роман", "A"))
+    library.add_book(Book("B story", "Автор", 2001, "Роман", "B"))
+    results = library.apply_batch([
+        ('update', 'B', Book("B story", "Автор", 2001, "Роман", "C")),
+        ('update', 'A', Book("A story", "Автор", 2000, "Роман", "B")),
+        ('update', 'C', Book("C story", "Автор", 2001, "Роман", "D")),
+    ])
+    assert results == [True, True, True]
+    found = [book.isbn for book in library.find_by_title("story")]
+    assert sorted(found) == sorted(scan(library, "story")) == ['B', 'D']
+    assert [book.isbn for book in library.search_text("a story")] == ['B']
+
+
+def test_update_keeps_scan_order():
+    library = Library("Порядок")
+    library.add_book(Book("old", "Автор", 2000, "Роман", "0"))
+    library.add_book(Book("hello", "Автор", 2000, "Роман", "1"))
+    library.update_book("0", Book("hello", "Автор", 2000, "Роман", "2"))
+    assert [book.isbn for book in library.find_by_title("hello")] == scan(library, "hello") == ['2', '1']
+    assert [book.isbn for book in library.find_by_title("he")] == ['2', '1']
+
+
+def test_update_does_not_change_shared_book():
+    shared = Book("Общая", "A", 2000, "Роман", "9")
+    first, second = Library("Первая"), Library("Вторая")
+    first.add_book(shared)
+    second.add_book(shared)
+    first.update_book("9", Book("Новая", "Z", 2001, "Роман", "10"))
+    assert (shared.isbn, shared.author) == ("9", "A")
+    assert second.find_by_isbn("9") is shared
+    assert list(second.find_by_author("A")) == [shared]
+    assert second.remove_book_by_isbn("9")
+    assert [book.isbn for book in first.find_by_author("Z")] == ["10"]
+
+
+def test_update_of_store_row():
+    store = BookStore([Book("Старая", "A", 2000, "Роман", "1")])
+    library = Library("Хранилище")
+    library.add_books(store)
+    assert library.update_book("1", Book("Новая", "B", 2001, "Роман", "1"))
+    assert store[0].title == "Старая"
+    assert [book.title for book in library.find_by_author("B")] == ["Новая"]
+    assert library.get_statistics()['total_authors'] == 1
+    assert [book.title for book in library.book_collection] == ["Новая"]